@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog
+from synthetic import generate_products
+
+SIZE = 100_000
+LOOKUPS = 1000
+
+
+def build_dicts(rows):
+    products_list = {}
+    for row in rows:
+        products_list.setdefault(row["category"], []).append(
+            {"sku": row["sku"], "name": row["name"], "quantity": row["quantity"], "price": row["price"]}
+        )
+    all_products = [product for category in products_list.values() for product in category]
+    return products_list, all_products
+
+
+def build_catalog(rows):
+    catalog = Catalog()
+    for row in rows:
+        catalog.add(**row)
+    return catalog
+
+
+def measure(build, size):
+    rows = list(generate_products(size))
+    started = time.perf_counter()
+    build(rows)
+    elapsed = time.perf_counter() - started
+    del rows
+
+    # строки создаются внутри замера памяти, как при разборе реальной выгрузки
+    tracemalloc.start()
+    result = build(generate_products(size))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, memory
+
+
+def main(size=SIZE):
+    (_, all_products), dict_time, dict_size = measure(build_dicts, size)
+    catalog, catalog_time, catalog_size = measure(build_catalog, size)
+    names = [all_products[index]["name"] for index in range(0, size, max(1, size // LOOKUPS))]
+
+    started = time.perf_counter()
+    for name in names[:50]:
+        for product in all_products:
+            if product["name"] == name:
+                break
+    scan_lookup = (time.perf_counter() - started) / 50
+
+    started = time.perf_counter()
+    for name in names:
+        catalog.get_by_name(name)
+    index_lookup = (time.perf_counter() - started) / len(names)
+
+    print(f"товаров: {size}")
+    print(f"dict-of-dicts: {dict_size / size:.0f} Б/товар, сборка {dict_time:.3f} с, поиск по имени {scan_lookup * 1e6:.1f} мкс")
+    print(f"Catalog:       {catalog_size / size:.0f} Б/товар, сборка {catalog_time:.3f} с, поиск по имени {index_lookup * 1e6:.3f} мкс")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZE)
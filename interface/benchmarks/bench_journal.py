@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog
+from core import Cart
+from journal import CartJournal
+from synthetic import generate_products
+
+OPERATIONS = 50_000
+RECOVERY_RECORDS = 1_000_000
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def cart_latency(catalog, journal=None, operations=OPERATIONS):
+    cart = Cart(catalog)
+    if journal is not None:
+        journal.attach(cart)
+    rng = random.Random(1)
+    product_ids = [rng.randrange(len(catalog)) for _ in range(operations)]
+
+    timings = []
+    for product_id in product_ids:
+        started = time.perf_counter()
+        cart.add(product_id)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    catalog = Catalog()
+    for row in generate_products(10_000):
+        catalog.add(**row)
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain = cart_latency(catalog)
+
+        journal = CartJournal(os.path.join(directory, "cart.journal"))
+        journal.recover()
+        journal.open()
+        journaled = cart_latency(catalog, journal)
+        journal.close()
+
+        for name, timings in (("без журнала", plain), ("с журналом", journaled)):
+            print(f"{name}: p50 {percentile(timings, 0.5) * 1e6:.2f} мкс, p99 {percentile(timings, 0.99) * 1e6:.2f} мкс")
+
+        path = os.path.join(directory, "large.journal")
+        rng = random.Random(2)
+        with open(path, "w", encoding="utf-8") as file:
+            for _ in range(RECOVERY_RECORDS):
+                file.write(f"{100000 + rng.randrange(10_000)}\t{rng.randrange(5)}\n")
+
+        started = time.perf_counter()
+        state = CartJournal(path, compact_records=RECOVERY_RECORDS * 2).recover()
+        elapsed = time.perf_counter() - started
+        print(f"восстановление: {RECOVERY_RECORDS} записей ({os.path.getsize(path) / 2 ** 20:.1f} МБ) "
+              f"за {elapsed:.2f} с, позиций в корзине {len(state)}")
+
+
+if __name__ == "__main__":
+    main()
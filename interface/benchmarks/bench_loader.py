@@ -0,0 +1,70 @@
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_products
+
+SIZE = 100_000
+FIELDS = ["sku", "name", "quantity", "price", "category"]
+
+
+def write_catalog(path, size):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(generate_products(size))
+        else:
+            for row in generate_products(size):
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def measure(path):
+    from loader import load_catalog
+
+    started = time.perf_counter()
+    catalog = load_catalog(path)
+    load_time = time.perf_counter() - started
+
+    category = catalog.category_names()[0]
+    started = time.perf_counter()
+    catalog.category_products(category)
+    first_category_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    catalog.materialize_all()
+    rest_time = time.perf_counter() - started
+
+    print(json.dumps({
+        "rows": len(catalog),
+        "errors": len(catalog.errors),
+        "load_s": round(load_time, 3),
+        "first_category_s": round(first_category_time, 3),
+        "materialize_rest_s": round(rest_time, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main(size=SIZE):
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ("csv", "jsonl"):
+            path = os.path.join(directory, f"catalog.{extension}")
+            write_catalog(path, size)
+            # каждый файл грузится в отдельном процессе, чтобы пиковый RSS не смешивался
+            result = subprocess.run([sys.executable, __file__, "--measure", path],
+                                    capture_output=True, text=True, check=True)
+            print(f"{extension} ({os.path.getsize(path) / 2 ** 20:.1f} МБ): {result.stdout.strip()}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--measure":
+        measure(sys.argv[2])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZE)
@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from orders import COLUMNS, DICTIONARY, OrderLog, column_path, daily_report
+from pricing import parse_price
+from synthetic import generate_products
+
+SKUS = 10_000
+LINES = 5_000_000
+LINES_PER_ORDER = 8
+APPENDS = 200
+
+
+def write_day(directory, day, products, lines, seed=1):
+    # колонки за день генерируются сразу массивами, формат тот же, что пишет OrderLog
+    rng = np.random.default_rng(seed)
+    with open(os.path.join(directory, DICTIONARY), "w", encoding="utf-8") as file:
+        for product in products:
+            file.write(f"{product['sku']}\t{product['category']}\n")
+
+    prices = np.array([product["price"] for product in products], dtype=np.int64)
+    sku = rng.integers(0, len(products), lines, dtype=np.uint32)
+    count = rng.integers(1, 4, lines, dtype=np.uint32)
+    list_amount = prices[sku] * count
+    # каждая пятая строка со скидкой, чтобы отчету было что считать по акциям
+    amount = np.where(rng.random(lines) < 0.2, list_amount * 9 // 10, list_amount)
+    columns = {
+        "order": np.arange(lines, dtype=np.uint64) // LINES_PER_ORDER + 1,
+        "time": np.full(lines, int(time.time()), dtype=np.int64),
+        "sku": sku,
+        "count": count,
+        "amount": amount,
+        "list_amount": list_amount,
+    }
+    os.makedirs(os.path.join(directory, day), exist_ok=True)
+    for name, typecode in COLUMNS:
+        columns[name].astype(typecode).tofile(column_path(directory, day, name))
+
+
+def main(lines=LINES):
+    products = [{**product, "price": parse_price(product["price"])} for product in generate_products(SKUS)]
+    # артикул акции должен попасть в словарь, иначе отчету по ней нечего показать
+    products[0]["sku"] = "2002"
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = OrderLog(directory)
+        basket = [(product["sku"], product["category"], 1, product["price"], product["price"])
+                  for product in random.Random(1).sample(products, LINES_PER_ORDER)]
+        started = time.perf_counter()
+        for _ in range(APPENDS):
+            log.append(basket).result()
+        append_ms = (time.perf_counter() - started) / APPENDS * 1000
+        log.close()
+        print(f"запись корзины из {LINES_PER_ORDER} строк: {append_ms:.2f} мс (с fsync, в фоновом потоке)")
+
+        day = "2000-01-01"
+        write_day(directory, day, products, lines)
+        size_mb = sum(os.path.getsize(column_path(directory, day, name)) for name, _ in COLUMNS) / 2 ** 20
+        started = time.perf_counter()
+        report = daily_report(directory, day)
+        elapsed = time.perf_counter() - started
+        print(f"отчет по {report['lines']} строкам ({size_mb:.0f} МБ колонок, {report['orders']} заказов): "
+              f"{elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else LINES)
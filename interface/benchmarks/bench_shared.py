@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_loader import write_catalog
+
+SIZE = 100_000
+KIOSKS = (1, 2, 4)
+
+
+def memory():
+    # Pss делит общие страницы между процессами, поэтому сумма Pss и есть реальная память киосков
+    values = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name.lower() + "_mb"] = round(int(rest.split()[0]) / 1024, 1)
+    return values
+
+
+def kiosk(mode, path, shared_dir):
+    from refresher import build_snapshot
+
+    started = time.perf_counter()
+    catalog, search_index = build_snapshot(path, shared_dir if mode == "shared" else None)
+    startup = time.perf_counter() - started
+    # как будто покупатель открыл категорию и что-то поискал
+    list(catalog.category_products(catalog.category_names()[0])[:10])
+    search_index.search("мол")
+
+    print(json.dumps({"startup_s": round(startup, 3)}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps(memory()), flush=True)
+
+
+def run(mode, path, shared_dir, count):
+    processes = []
+    results = []
+    # киоски стартуют по очереди, как после перезагрузки машины
+    for _ in range(count):
+        process = subprocess.Popen([sys.executable, __file__, "--kiosk", mode, path, shared_dir],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        results.append(json.loads(process.stdout.readline()))
+        processes.append(process)
+    # память меряется, когда все киоски живы одновременно
+    for process, result in zip(processes, results):
+        process.stdin.write("\n")
+        process.stdin.flush()
+        result.update(json.loads(process.stdout.readline()))
+        process.wait()
+    return results
+
+
+def main(size=SIZE):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.csv")
+        write_catalog(path, size)
+        for count in KIOSKS:
+            for mode in ("plain", "shared"):
+                shared_dir = os.path.join(directory, f"shared-{count}")
+                results = run(mode, path, shared_dir, count)
+                print(json.dumps({
+                    "mode": mode,
+                    "kiosks": count,
+                    "startup_s": [result["startup_s"] for result in results],
+                    "total_rss_mb": round(sum(result["rss_mb"] for result in results), 1),
+                    "total_pss_mb": round(sum(result["pss_mb"] for result in results), 1),
+                }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--kiosk":
+        kiosk(*sys.argv[2:5])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZE)
@@ -0,0 +1,73 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_loader import write_catalog
+from shared_catalog import publish
+
+# Нужен дисплей, на сервере запускать под Xvfb: xvfb-run python benchmarks/bench_startup.py
+# Кэш страниц между запусками не сбрасывается, это время теплого старта
+
+SIZE = 100_000
+RUNS = 5
+TIMEOUT = 60
+
+
+def start(arguments, environment, directory):
+    trace = os.path.join(directory, "startup.json")
+    if os.path.exists(trace):
+        os.remove(trace)
+    env = {**os.environ, **environment, "KIOSK_STARTUP_TRACE": trace,
+           "KIOSK_CART_JOURNAL": os.path.join(directory, "cart.journal")}
+
+    started = time.time()
+    process = subprocess.Popen([sys.executable, "interface.py", *arguments], cwd=ROOT, env=env)
+    try:
+        while not os.path.exists(trace):
+            if process.poll() is not None or time.time() - started > TIMEOUT:
+                raise RuntimeError(f"киоск не запустился: {arguments}")
+            time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+
+    with open(trace, encoding="utf-8") as file:
+        marks = json.load(file)
+    return {name: marks[name] - started for name in ("imported", "first_frame", "interactive")}
+
+
+def main(size=SIZE, runs=RUNS):
+    if not os.environ.get("DISPLAY"):
+        sys.exit("Нужен дисплей: xvfb-run python benchmarks/bench_startup.py")
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = os.path.join(directory, "catalog.csv")
+        bundle = os.path.join(directory, "catalog.kiosk")
+        write_catalog(catalog, size)
+        publish(catalog, bundle)
+
+        modes = [
+            ("встроенный каталог", [], {}),
+            ("встроенный каталог, быстрый старт", [], {"KIOSK_FAST_START": "1"}),
+            (f"csv {size}", [catalog], {}),
+            (f"csv {size}, быстрый старт", [catalog], {"KIOSK_FAST_START": "1"}),
+            (f"снимок {size}, быстрый старт", [bundle], {"KIOSK_FAST_START": "1"}),
+        ]
+        for name, arguments, environment in modes:
+            results = [start(arguments, environment, directory) for _ in range(runs)]
+            print(json.dumps({
+                "mode": name,
+                **{f"{mark}_s": round(statistics.median(result[mark] for result in results), 3)
+                   for mark in ("imported", "first_frame", "interactive")},
+            }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else SIZE)
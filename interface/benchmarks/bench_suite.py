@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_loader import write_catalog
+from catalog import Catalog
+from core import Cart
+from search import SearchIndex
+from synthetic import WORDS, generate_products
+
+# Сценарии отрисовки нужны дисплей, на сервере запускать под Xvfb: xvfb-run python benchmarks/bench_suite.py
+# Без дисплея они пропускаются, остальные сценарии работают без интерфейса
+
+SIZES = (1_000, 10_000, 100_000)
+CART_LINES = (1, 10, 100, 500)
+OPERATIONS = 2_000
+RENDER_OPERATIONS = 200
+REPEAT = 3
+REGRESSION_THRESHOLD = 0.2
+# изменения меньше этих считаются шумом таймера
+MIN_DELTA_US = 1.0
+MIN_DELTA_SECONDS = 0.05
+
+
+def summarize(timings, wall=None):
+    timings = sorted(timings)
+
+    def percentile(fraction):
+        return round(timings[min(len(timings) - 1, int(len(timings) * fraction))] * 1e6, 2)
+
+    wall = sum(timings) if wall is None else wall
+    return {
+        "operations": len(timings),
+        "p50_us": percentile(0.5),
+        "p90_us": percentile(0.9),
+        "p99_us": percentile(0.99),
+        "max_us": round(timings[-1] * 1e6, 2),
+        "ops_per_s": round(len(timings) / wall, 1) if wall else None,
+    }
+
+
+def measure(operation, arguments, repeat=REPEAT):
+    # прогон повторяется, в результат идет самый быстрый по медиане: так меньше шума от соседей по машине
+    best = None
+    for _ in range(repeat):
+        timings = []
+        started = time.perf_counter()
+        for argument in arguments:
+            operation_started = time.perf_counter()
+            operation(argument)
+            timings.append(time.perf_counter() - operation_started)
+        result = summarize(timings, time.perf_counter() - started)
+        if best is None or result["p50_us"] < best["p50_us"]:
+            best = result
+    return best
+
+
+def typed_queries(rng, count):
+    # запросы как при наборе: каждое слово вводится по букве
+    queries = []
+    while len(queries) < count:
+        word = rng.choice(WORDS).lower()
+        queries.extend(word[:length] for length in range(1, len(word) + 1))
+    return queries[:count]
+
+
+def fill_cart(cart, catalog, lines, rng):
+    with cart.batch():
+        for product_id in rng.sample(range(len(catalog)), lines):
+            cart.add(product_id, rng.randint(1, 3))
+    return list(cart.counts)
+
+
+def core_cases(size, results):
+    rng = random.Random(size)
+    catalog = Catalog()
+    for row in generate_products(size):
+        catalog.add(**row)
+
+    build_times = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        index = SearchIndex(catalog.products)
+        build_times.append(time.perf_counter() - started)
+    results[f"search_index_build/{size}"] = {"seconds": round(min(build_times), 3)}
+    results[f"search/{size}"] = measure(index.search, typed_queries(rng, OPERATIONS))
+
+    for lines in CART_LINES:
+        cart = Cart(catalog)
+        in_cart = fill_cart(cart, catalog, lines, rng)
+        product_ids = [rng.choice(in_cart) for _ in range(OPERATIONS)]
+        # каждое добавление потом снимается, так что корзина между повторами не меняется
+        results[f"cart_add/{size}/{lines}"] = measure(cart.add, product_ids, repeat=1)
+        results[f"cart_remove/{size}/{lines}"] = measure(cart.remove, product_ids, repeat=1)
+        results[f"total/{size}/{lines}"] = measure(lambda _: cart.total(), range(OPERATIONS))
+
+
+def render_cases(size, results, directory):
+    from interface import App
+
+    path = os.path.join(directory, f"catalog-{size}.csv")
+    write_catalog(path, size)
+    rng = random.Random(size)
+    app = App(path)
+    try:
+        app.update()
+
+        def rendered(operation):
+            def run(argument):
+                operation(argument)
+                app.update_idletasks()
+            return run
+
+        app.open_products_screen()
+        categories = app.catalog.category_names()
+        results[f"render_category/{size}"] = measure(
+            rendered(app.show_category_products), [rng.choice(categories) for _ in range(RENDER_OPERATIONS)])
+        view = app.products_view
+        results[f"render_scroll/{size}"] = measure(
+            rendered(view.scroll_to), [rng.randrange(view.content_height()) for _ in range(RENDER_OPERATIONS)])
+
+        app.open_cart_screen()
+        for lines in CART_LINES:
+            app.cart.clear()
+            app.update()
+            started = time.perf_counter()
+            in_cart = fill_cart(app.cart, app.catalog, lines, rng)
+            app.update_idletasks()
+            results[f"render_cart_fill/{size}/{lines}"] = {"seconds": round(time.perf_counter() - started, 4)}
+
+            results[f"render_add_to_cart/{size}/{lines}"] = measure(
+                rendered(app.add_to_cart), [rng.choice(in_cart) for _ in range(RENDER_OPERATIONS)])
+            results[f"render_cart_view/{size}/{lines}"] = measure(
+                rendered(lambda _: app.update_cart_view()), range(RENDER_OPERATIONS))
+            results[f"render_total/{size}/{lines}"] = measure(
+                rendered(lambda _: app.update_total_price()), range(RENDER_OPERATIONS))
+        app.cart.clear()
+    finally:
+        app.destroy()
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(baseline, current, threshold, min_delta_us=MIN_DELTA_US):
+    # регрессией считается рост p50 больше порога; время сборки и заполнения сравнивается по seconds
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        key = "p50_us" if "p50_us" in result else "seconds"
+        if previous.get(key) and result.get(key) is not None:
+            change = result[key] / previous[key] - 1
+            if key == "p50_us":
+                noise = result[key] - previous[key] <= min_delta_us
+            else:
+                noise = result[key] - previous[key] <= MIN_DELTA_SECONDS
+            if change > threshold and not noise:
+                regressions.append((name, key, previous[key], result[key], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки поиска, корзины, итогов и отрисовки")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="размеры каталога через запятую")
+    parser.add_argument("--output", default="bench_results.json", help="куда сохранить результаты")
+    parser.add_argument("--compare", help="файл прошлых результатов для сравнения")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="допустимый рост p50")
+    parser.add_argument("--min-delta-us", type=float, default=MIN_DELTA_US, help="меньший рост считается шумом")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # журнал корзины и заказы киоска не должны попасть в рабочую папку
+        os.environ["KIOSK_CART_JOURNAL"] = os.path.join(directory, "cart.journal")
+        os.environ["KIOSK_ORDER_LOG"] = os.path.join(directory, "orders")
+        for size in sizes:
+            core_cases(size, results)
+            if os.environ.get("DISPLAY"):
+                render_cases(size, results, directory)
+            print(f"каталог {size}: готово", file=sys.stderr)
+
+    report = {"environment": environment(), "display": bool(os.environ.get("DISPLAY")), "results": results}
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    for name, result in results.items():
+        if "p50_us" in result:
+            print(f"{name}: p50 {result['p50_us']} мкс, p99 {result['p99_us']} мкс, {result['ops_per_s']} оп/с")
+        else:
+            print(f"{name}: {result['seconds']} с")
+    if not report["display"]:
+        print("нет дисплея: сценарии отрисовки пропущены")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(json.load(file), report, args.threshold, args.min_delta_us)
+        for name, key, before, after, change in regressions:
+            print(f"регрессия {name}: {key} {before} -> {after} (+{change:.0%})")
+        if regressions:
+            sys.exit(1)
+        print("регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
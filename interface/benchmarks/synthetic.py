@@ -0,0 +1,20 @@
+import random
+
+CATEGORIES = ["Фрукты, овощи", "Молочный отдел", "Мясная лавка", "Выпечка"]
+WORDS = ["Яблоки", "Бананы", "Апельсины", "Молоко", "Сыр", "Йогурт", "Курица", "Говядина", "Свинина",
+         "Хлеб", "Булка", "Круассан", "Кефир", "Творог", "Сметана", "Груши", "Ёжевика", "Печенье"]
+ADJECTIVES = ["свежие", "домашний", "фермерский", "отборные", "деревенский", "молочный", "белый", "ржаной"]
+UNITS = ["1 кг", "500 г", "200 г", "1 л", "1 шт"]
+
+
+def generate_products(count, seed=1):
+    rng = random.Random(seed)
+    for number in range(count):
+        name = f"{rng.choice(WORDS)} {rng.choice(ADJECTIVES)} {number}"
+        yield {
+            "sku": str(100000 + number),
+            "name": name,
+            "quantity": rng.choice(UNITS),
+            "price": f"{rng.randint(10, 2000)}.{rng.randint(0, 99):02d}₽",
+            "category": CATEGORIES[number % len(CATEGORIES)],
+        }
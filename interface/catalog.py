@@ -0,0 +1,283 @@
+import threading
+from array import array
+
+from pricing import format_price, parse_price
+
+
+class Product:
+    __slots__ = ("id", "sku", "name", "quantity", "price", "category")
+
+    def __init__(self, product_id, sku, name, quantity, price, category):
+        self.id = product_id
+        self.sku = sku
+        self.name = name
+        self.quantity = quantity
+        self.price = price
+        self.category = category
+
+    @property
+    def price_text(self):
+        return format_price(self.price, ".")
+
+    def __repr__(self):
+        return f"Product({self.id}, {self.sku!r}, {self.name!r})"
+
+
+class StringColumn:
+    # строки одного поля подряд в UTF-8 плюс таблица смещений
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets=None, data=None):
+        self.offsets = array("I", [0]) if offsets is None else offsets
+        self.data = bytearray() if data is None else data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def append(self, encoded):
+        self.data += encoded
+        self.offsets.append(len(self.data))
+
+    def raw(self, index):
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def __getitem__(self, index):
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+
+class KeyIndex:
+    # Хеш-таблица с открытой адресацией: в слотах только id товаров, сами ключи лежат в колонке,
+    # а их хеши в array('q') по id. Это 12-16 байт на товар вместо записи словаря со своей
+    # строкой-ключом и объектом int
+    __slots__ = ("column", "hashes", "slots", "size")
+
+    def __init__(self, column):
+        self.column = column
+        self.hashes = array("q")
+        self.slots = array("i", [-1]) * 8
+        self.size = 0
+
+    def slot(self, encoded, key_hash):
+        # слот, где лежит ключ, или пустой слот, куда его можно вставить
+        slots, hashes = self.slots, self.hashes
+        mask = len(slots) - 1
+        index = key_hash & mask
+        while True:
+            product_id = slots[index]
+            if product_id < 0 or hashes[product_id] == key_hash and self.column.raw(product_id) == encoded:
+                return index
+            index = (index + 1) & mask
+
+    def find(self, key):
+        encoded = key.encode("utf-8")
+        return self.slots[self.slot(encoded, hash(encoded))]
+
+    def reserve(self):
+        # заполнение держится не выше половины, иначе цепочки проб растут;
+        # новая таблица собирается целиком и только потом подменяет старую
+        if (self.size + 1) * 2 <= len(self.slots):
+            return
+        slots = array("i", [-1]) * (len(self.slots) * 2)
+        mask = len(slots) - 1
+        hashes = self.hashes
+        for product_id in self.slots:
+            if product_id >= 0:
+                index = hashes[product_id] & mask
+                while slots[index] >= 0:
+                    index = (index + 1) & mask
+                slots[index] = product_id
+        self.slots = slots
+
+    def put(self, slot, product_id):
+        self.slots[slot] = product_id
+        self.size += 1
+
+
+class ProductSequence:
+    # список товаров, объекты Product собираются только при обращении
+    __slots__ = ("catalog", "ids")
+
+    def __init__(self, catalog, ids):
+        self.catalog = catalog
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.catalog.get(product_id) for product_id in self.ids[index]]
+        return self.catalog.get(self.ids[index])
+
+    def __iter__(self):
+        return map(self.catalog.get, self.ids)
+
+
+class Catalog:
+    # Товары хранятся по колонкам: строки в UTF-8 подряд, цены в array('q'), единицы и категории
+    # интернируются в коды. Product собирается только при обращении, товар находится за O(1)
+    # по id, артикулу, названию и штрихкоду
+    def __init__(self):
+        self.skus = StringColumn()
+        self.names = StringColumn()
+        self.barcodes = StringColumn()
+        self.prices = array("q")
+        self.units = array("H")
+        self.unit_names = []
+        self.unit_codes = {}
+        self.category_codes = array("h")
+        self.category_list = []
+        self.category_index = {}
+        self.by_sku = KeyIndex(self.skus)
+        self.by_name = KeyIndex(self.names)
+        self.by_barcode = KeyIndex(self.barcodes)
+        # категория -> array('I') с id товаров
+        self.categories = {}
+        # категории, строки которых еще не разобраны: категория -> функция, отдающая строки
+        self.pending = {}
+        # артикул и штрихкод -> категория для еще не разобранных строк, если источник это знает
+        self.pending_skus = None
+        self.pending_barcodes = None
+        self.errors = []
+        # вызывается для ошибок, найденных уже после загрузки, при разборе отложенной категории
+        self.on_error = None
+        self.source = None
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_categories(cls, products_list):
+        catalog = cls()
+        for category, products in products_list.items():
+            for product in products:
+                catalog.add(category=category, **product)
+        return catalog
+
+    def add(self, sku, name, quantity, price, category=None, barcode=None):
+        if isinstance(price, str):
+            price = parse_price(price)
+        by_sku, by_name, by_barcode = self.by_sku, self.by_name, self.by_barcode
+        encoded_sku = sku.encode("utf-8")
+        encoded_name = name.encode("utf-8")
+        encoded_barcode = barcode.encode("utf-8") if barcode else b""
+        sku_hash, name_hash, barcode_hash = hash(encoded_sku), hash(encoded_name), hash(encoded_barcode)
+        by_sku.reserve()
+        by_name.reserve()
+        by_barcode.reserve()
+
+        sku_slot = by_sku.slot(encoded_sku, sku_hash)
+        if by_sku.slots[sku_slot] >= 0:
+            raise ValueError(f"Артикул {sku} уже есть в каталоге")
+        if encoded_barcode:
+            barcode_slot = by_barcode.slot(encoded_barcode, barcode_hash)
+            if by_barcode.slots[barcode_slot] >= 0:
+                raise ValueError(f"Штрихкод {barcode} уже есть в каталоге")
+        name_slot = by_name.slot(encoded_name, name_hash)
+
+        # сначала колонки, потом слоты индексов: читатель из другого потока не увидит id без данных
+        product_id = len(self.prices)
+        self.skus.append(encoded_sku)
+        self.names.append(encoded_name)
+        self.barcodes.append(encoded_barcode)
+        by_sku.hashes.append(sku_hash)
+        by_name.hashes.append(name_hash)
+        by_barcode.hashes.append(barcode_hash)
+        self.units.append(self._code(self.unit_codes, self.unit_names, quantity))
+        if category is None:
+            self.category_codes.append(-1)
+        else:
+            self.category_codes.append(self._code(self.category_index, self.category_list, category))
+        self.prices.append(price)
+
+        by_sku.put(sku_slot, product_id)
+        # при одинаковых названиях по имени находится первый товар
+        if by_name.slots[name_slot] < 0:
+            by_name.put(name_slot, product_id)
+        if encoded_barcode:
+            by_barcode.put(barcode_slot, product_id)
+        if category is not None:
+            self.categories.setdefault(category, array("I")).append(product_id)
+        return product_id
+
+    @staticmethod
+    def _code(codes, names, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    @property
+    def products(self):
+        return ProductSequence(self, range(len(self.prices)))
+
+    def get(self, product_id):
+        category = self.category_codes[product_id]
+        return Product(product_id, self.skus[product_id], self.names[product_id],
+                       self.unit_names[self.units[product_id]], self.prices[product_id],
+                       self.category_list[category] if category >= 0 else None)
+
+    def _get_by(self, index, value, pending_keys=None):
+        # Найденный id уже не изменится; промах перепроверяется после разбора, который
+        # мог идти в другом потоке: materialize дожидается его на блокировке.
+        # Если источник знает категорию ключа, разбирается только она, а неизвестный ключ
+        # не разбирает ничего
+        product_id = index.find(value) if value else -1
+        if product_id < 0 and self.pending:
+            if pending_keys is None:
+                self.materialize_all()
+            elif value in pending_keys:
+                self.materialize(pending_keys[value])
+            product_id = index.find(value) if value else -1
+        return None if product_id < 0 else self.get(product_id)
+
+    def get_by_sku(self, sku):
+        return self._get_by(self.by_sku, sku, self.pending_skus)
+
+    def get_by_name(self, name):
+        return self._get_by(self.by_name, name)
+
+    def get_by_barcode(self, barcode):
+        return self._get_by(self.by_barcode, barcode, self.pending_barcodes)
+
+    def category_names(self):
+        return [category for category in {**self.categories, **self.pending} if category is not None]
+
+    def materialize(self, category):
+        # Категория уходит из pending только разобранной целиком: кто не видит ее в pending,
+        # видит и все ее строки, а кто видит, ждет на блокировке потока, который ее разбирает
+        if category not in self.pending:
+            return
+        with self.lock:
+            rows = self.pending.get(category)
+            if rows is None:
+                return
+            try:
+                for line_number, row in rows():
+                    try:
+                        self.add(category=category, **row)
+                    except ValueError as error:
+                        self.report(line_number, str(error))
+            finally:
+                del self.pending[category]
+
+    def report(self, line_number, message):
+        self.errors.append((line_number, message))
+        if self.on_error is not None:
+            self.on_error(line_number, message)
+
+    def materialize_all(self):
+        for category in list(self.pending):
+            self.materialize(category)
+        self.pending_skus = None
+        self.pending_barcodes = None
+        return self.products
+
+    def category_products(self, category):
+        self.materialize(category)
+        return ProductSequence(self, self.categories.get(category, ()))
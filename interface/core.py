@@ -0,0 +1,129 @@
+from collections import Counter
+from contextlib import contextmanager
+
+from catalog import Catalog, Product
+from pricing import Pricing
+from search import SearchIndex
+
+__all__ = ["Catalog", "Product", "Cart", "Pricing", "SearchIndex"]
+
+
+class Cart:
+    # Корзина без интерфейса: id строки каталога -> количество. Подписчики получают
+    # множество изменившихся id один раз на операцию или на всю пачку операций
+    def __init__(self, catalog, pricing=None):
+        self.catalog = catalog
+        self.pricing = pricing or Pricing()
+        self.counts = {}
+        self.listeners = []
+        self.batch_depth = 0
+        self.changed = set()
+
+    def __contains__(self, product_id):
+        return product_id in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def items(self):
+        return self.counts.items()
+
+    def count(self, product_id):
+        return self.counts.get(product_id, 0)
+
+    def total(self):
+        return self.pricing.total_amount()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    @contextmanager
+    def batch(self):
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth:
+                self.notify()
+
+    def notify(self):
+        if self.batch_depth or not self.changed:
+            return
+        changed, self.changed = self.changed, set()
+        for listener in self.listeners:
+            listener(changed)
+
+    def set_count(self, product_id, count):
+        product = self.catalog.get(product_id)
+        if count > 0:
+            self.counts[product_id] = count
+        else:
+            count = 0
+            self.counts.pop(product_id, None)
+        self.pricing.set_count(product, count)
+        self.changed.add(product_id)
+        self.notify()
+        return count
+
+    def add(self, product_id, count=1):
+        return self.set_count(product_id, self.count(product_id) + count)
+
+    def remove(self, product_id, count=1):
+        return self.set_count(product_id, self.count(product_id) - count)
+
+    def add_promo(self, product_id):
+        return self.add(product_id, self.pricing.promo_quantity(self.catalog.get(product_id)))
+
+    def add_many(self, skus):
+        # возвращает артикулы, которых нет в каталоге
+        unknown = []
+        with self.batch():
+            for sku, count in Counter(skus).items():
+                product = self.catalog.get_by_sku(sku)
+                if product is None:
+                    unknown.append(sku)
+                else:
+                    self.add(product.id, count)
+        return unknown
+
+    def apply_basket(self, basket):
+        # корзина приводится ровно к содержимому basket: артикул -> количество
+        unknown = []
+        with self.batch():
+            wanted = {}
+            for sku, count in basket.items():
+                product = self.catalog.get_by_sku(sku)
+                if product is None:
+                    unknown.append(sku)
+                else:
+                    wanted[product.id] = wanted.get(product.id, 0) + count
+            for product_id in [product_id for product_id in self.counts if product_id not in wanted]:
+                self.set_count(product_id, 0)
+            for product_id, count in wanted.items():
+                self.set_count(product_id, count)
+        return unknown
+
+    def rebind(self, catalog):
+        # переносит корзину на новый снимок каталога по артикулам, возвращает старый id -> новый id;
+        # товары, которых больше нет в продаже, убираются из корзины обычным событием
+        mapping = {}
+        for product_id in self.counts:
+            product = catalog.get_by_sku(self.catalog.get(product_id).sku)
+            if product is not None:
+                mapping[product_id] = product.id
+        with self.batch():
+            for product_id in [product_id for product_id in self.counts if product_id not in mapping]:
+                self.set_count(product_id, 0)
+
+        self.catalog = catalog
+        self.counts = {mapping[product_id]: count for product_id, count in self.counts.items()}
+        self.pricing.reset()
+        for product_id, count in self.counts.items():
+            self.pricing.set_count(catalog.get(product_id), count)
+        return mapping
+
+    def clear(self):
+        with self.batch():
+            for product_id in list(self.counts):
+                self.set_count(product_id, 0)
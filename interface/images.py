@@ -0,0 +1,124 @@
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import customtkinter as ctk
+from PIL import Image
+
+THUMBNAIL_DIR = ".thumbnails"
+CACHE_BYTES = 32 * 2 ** 20
+POLL_MS = 20
+
+
+class ImageLoader:
+    # Картинки декодируются в фоновом потоке при первом показе, уменьшенные копии
+    # под нужный размер кладутся на диск, готовые CTkImage хранятся в LRU-кэше
+    def __init__(self, master, thumbnail_dir=THUMBNAIL_DIR, cache_bytes=CACHE_BYTES):
+        self.master = master
+        self.thumbnail_dir = thumbnail_dir
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.waiting = {}
+        self.decoded = queue.Queue()
+        self.poll_job = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def thumbnail_path(self, path, size):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.thumbnail_dir, f"{name}_{size[0]}x{size[1]}.png")
+
+    def read_thumbnail(self, path, thumbnail):
+        # битая или недописанная копия не страшна: картинка просто соберется заново из исходника
+        try:
+            if os.path.getmtime(thumbnail) < os.path.getmtime(path):
+                return None
+            with Image.open(thumbnail) as image:
+                image.load()
+            return image
+        except Exception:
+            return None
+
+    def write_thumbnail(self, image, thumbnail):
+        # копия пишется во временный файл и подменяется целиком, чтобы соседний процесс
+        # не прочитал ее наполовину записанной
+        temporary = f"{thumbnail}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+            image.save(temporary, format="PNG")
+            os.replace(temporary, thumbnail)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def decode(self, key):
+        path, size = key
+        try:
+            thumbnail = self.thumbnail_path(path, size)
+            image = self.read_thumbnail(path, thumbnail)
+            if image is None:
+                with Image.open(path) as source:
+                    image = source.resize(size, Image.LANCZOS)
+                self.write_thumbnail(image, thumbnail)
+            self.decoded.put((key, image))
+        except Exception as error:
+            # любая ошибка, не только OSError (например, DecompressionBombError), снимает ожидание,
+            # иначе poll перезапускался бы бесконечно
+            self.decoded.put((key, error))
+
+    def load(self, path, size, callback=None):
+        key = (path, tuple(size))
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            if callback is not None:
+                callback(entry[0])
+            return
+
+        callbacks = self.waiting.get(key)
+        if callbacks is None:
+            callbacks = self.waiting[key] = []
+            self.executor.submit(self.decode, key)
+            if self.poll_job is None:
+                self.poll_job = self.master.after(POLL_MS, self.poll)
+        if callback is not None:
+            callbacks.append(callback)
+
+    def load_into(self, widget, path, size):
+        def apply(image):
+            if widget.winfo_exists():
+                widget.configure(image=image)
+
+        self.load(path, size, apply)
+
+    def prefetch(self, images):
+        for path, size in images:
+            self.load(path, size)
+
+    def poll(self):
+        self.poll_job = None
+        while True:
+            try:
+                key, image = self.decoded.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self.waiting.pop(key, [])
+            if isinstance(image, Exception):
+                continue
+
+            ctk_image = ctk.CTkImage(image, size=key[1])
+            self.store(key, ctk_image, image.width * image.height * 4)
+            for callback in callbacks:
+                callback(ctk_image)
+
+        if self.waiting:
+            self.poll_job = self.master.after(POLL_MS, self.poll)
+
+    def store(self, key, image, size_bytes):
+        self.cache[key] = (image, size_bytes)
+        self.cached_bytes += size_bytes
+        while self.cached_bytes > self.cache_bytes and len(self.cache) > 1:
+            _, (_, evicted_bytes) = self.cache.popitem(last=False)
+            self.cached_bytes -= evicted_bytes
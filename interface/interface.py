@@ -1,77 +1,236 @@
 import customtkinter as ctk
 from tkinter import messagebox
-from PIL import Image
-import webbrowser
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import Catalog
+from core import Cart
+from images import ImageLoader
+from journal import INSTANCE, CartJournal, journal_path
+from loader import load_catalog
+from pricing import format_price
+from product_list import VirtualProductList
+from refresher import CatalogRefresher, build_snapshot, find_catalog_file
+from router import ScreenRouter
+from scanner import BarcodeScanner
+from search import SearchIndex
+from shared_catalog import BUNDLE_EXTENSION, SHARED_DIR
+from startup import FAST_START, StartupTrace
+from toasts import ToastQueue
+
+# платежи (asyncio), метрики, монитор памяти и журнал заказов импортируются при первом использовании
+IMPORTED = time.time()
+
+SEARCH_DELAY_MS = 150
+SEARCH_POLL_MS = 20
+PAYMENT_POLL_MS = 50
+INSTRUMENTED_HANDLERS = (
+    "update_products_list", "show_products", "schedule_search", "update_cart_view",
+    "add_to_cart", "remove_from_cart", "increase_quantity", "decrease_quantity",
+)
+
+
+def create_default_catalog():
+    products_list = {
+        "Фрукты, овощи": [
+            {"sku": "1001", "name": "Яблоки", "quantity": "1 кг", "price": "100₽", "barcode": "4600000001001"},
+            {"sku": "1002", "name": "Бананы", "quantity": "1 кг", "price": "80₽", "barcode": "4600000001002"},
+            {"sku": "1003", "name": "Апельсины", "quantity": "1 кг", "price": "120₽", "barcode": "4600000001003"}
+        ],
+        "Молочный отдел": [
+            {"sku": "1004", "name": "Молоко", "quantity": "1 л", "price": "60₽", "barcode": "4600000001004"},
+            {"sku": "1005", "name": "Сыр", "quantity": "200 г", "price": "150₽", "barcode": "4600000001005"},
+            {"sku": "1006", "name": "Йогурт", "quantity": "500 г", "price": "70₽", "barcode": "4600000001006"}
+        ],
+        "Мясная лавка": [
+            {"sku": "1007", "name": "Курица", "quantity": "500 г", "price": "200₽", "barcode": "4600000001007"},
+            {"sku": "1008", "name": "Говядина", "quantity": "500 г", "price": "300₽", "barcode": "4600000001008"},
+            {"sku": "1009", "name": "Свинина", "quantity": "500 г", "price": "250₽", "barcode": "4600000001009"}
+        ],
+        "Выпечка": [
+            {"sku": "1010", "name": "Хлеб", "quantity": "1 шт", "price": "30₽", "barcode": "4600000001010"},
+            {"sku": "1011", "name": "Булка", "quantity": "1 шт", "price": "25₽", "barcode": "4600000001011"},
+            {"sku": "1012", "name": "Круассан", "quantity": "1 шт", "price": "40₽", "barcode": "4600000001012"}
+        ]
+    }
+
+    catalog = Catalog.from_categories(products_list)
+    catalog.add("2001", "Сникерс", "1 шт", "119.99₽", barcode="5000159461122")
+    catalog.add("2002", "Киндер", "1 шт", "150₽", barcode="4008400401621")
+    return catalog
+
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, catalog_path=None, search_delay=SEARCH_DELAY_MS, metrics_path=None, shared_dir=SHARED_DIR,
+                 fast_start=FAST_START):
         super().__init__()
+        self.startup = StartupTrace(imported=IMPORTED)
+
+        # метрики включаются только явно, иначе обработчики остаются без оберток
+        metrics_path = metrics_path or os.environ.get("KIOSK_METRICS")
+        self.metrics = None
+        if metrics_path:
+            from metrics import Metrics
+            self.metrics = Metrics(self, metrics_path)
+            for handler in INSTRUMENTED_HANDLERS:
+                self.metrics.instrument(self, handler)
+        memory_path = os.environ.get("KIOSK_MEMORY_MONITOR")
+        self.memory_monitor = None
+        if memory_path:
+            from memory_monitor import MemoryMonitor
+            self.memory_monitor = MemoryMonitor(self, memory_path)
+            self.memory_monitor.start()
 
         self.title("Лента")
         self.geometry("436x767")
         self.resizable(False, False)
 
-        self.background_image = ctk.CTkImage(Image.open("back.png"), size=(436, 767))
+        # картинки декодируются при первом показе, здесь только пути и размеры
+        self.images = ImageLoader(self)
+        self.background_image = ("back.png", (436, 767))
         self.product_images = {
-            "Фрукты, овощи": ctk.CTkImage(Image.open("fruits.png"), size=(140, 100)),
-            "Молочный отдел": ctk.CTkImage(Image.open("dairy.png"), size=(100, 100)),
-            "Мясная лавка": ctk.CTkImage(Image.open("meat.png"), size=(140, 100)),
-            "Выпечка": ctk.CTkImage(Image.open("bakery.png"), size=(140, 100))
+            "Фрукты, овощи": ("fruits.png", (140, 100)),
+            "Молочный отдел": ("dairy.png", (100, 100)),
+            "Мясная лавка": ("meat.png", (140, 100)),
+            "Выпечка": ("bakery.png", (140, 100))
         }
-        self.discount_image = ctk.CTkImage(Image.open("snickers.png"), size=(100, 100))
-        self.promo_image = ctk.CTkImage(Image.open("kinder.png"), size=(100, 100))
-
-        self.cart = {}
-        self.products_list = {
-            "Фрукты, овощи": [
-                {"name": "Яблоки", "quantity": "1 кг", "price": "100₽"},
-                {"name": "Бананы", "quantity": "1 кг", "price": "80₽"},
-                {"name": "Апельсины", "quantity": "1 кг", "price": "120₽"}
-            ],
-            "Молочный отдел": [
-                {"name": "Молоко", "quantity": "1 л", "price": "60₽"},
-                {"name": "Сыр", "quantity": "200 г", "price": "150₽"},
-                {"name": "Йогурт", "quantity": "500 г", "price": "70₽"}
-            ],
-            "Мясная лавка": [
-                {"name": "Курица", "quantity": "500 г", "price": "200₽"},
-                {"name": "Говядина", "quantity": "500 г", "price": "300₽"},
-                {"name": "Свинина", "quantity": "500 г", "price": "250₽"}
-            ],
-            "Выпечка": [
-                {"name": "Хлеб", "quantity": "1 шт", "price": "30₽"},
-                {"name": "Булка", "quantity": "1 шт", "price": "25₽"},
-                {"name": "Круассан", "quantity": "1 шт", "price": "40₽"}
-            ]
+        # картинки акций по артикулу товара
+        self.promotion_images = {
+            "2001": ("snickers.png", (100, 100)),
+            "2002": ("kinder.png", (100, 100))
         }
 
-        self.all_products = [
-            product for category in self.products_list.values() for product in category
-        ]
-        self.all_products.append({"name": "Сникерс", "quantity": "1 шт", "price": "89.99₽"})
-        self.all_products.append({"name": "Киндер", "quantity": "1 шт", "price": "150₽"})
+        self.catalog_path = catalog_path
+        self.shared_dir = shared_dir
+        self.catalog = None
+        # кнопки экранов, которым нужны каталог и корзина; в быстром режиме до загрузки они выключены
+        self.catalog_buttons = []
+        self.search_index = None
+        self.journal = None
+        self.refresher = None
+        # платежный клиент запускается при первой оплате
+        self.payments = None
+        self.payment_future = None
+        self.payment_events = queue.Queue()
+        self.payment_lines = None
+        # оплаченные корзины пишутся в колоночный журнал заказов для отчетов за день
+        self.orders = None
+
+        # поиск идет в отдельном потоке, в интерфейс попадает только результат последнего запроса
+        self.search_delay = search_delay
+        self.search_job = None
+        self.search_poll_job = None
+        self.search_generation = 0
+        self.search_pending = 0
+        self.search_results = queue.Queue()
+        self.search_executor = ThreadPoolExecutor(max_workers=1)
 
         self.current_products = []
-
-        self.create_main_screen()
+        self.current_category = None
+
+        # в быстром режиме каталог и корзина загружаются уже после первого кадра
+        if not fast_start:
+            self.load_catalog_and_cart()
+
+        self.toasts = ToastQueue(self)
+        self.router = ScreenRouter()
+        self.router.register("main", self.create_main_screen)
+        self.router.register("products", self.create_products_screen)
+        self.router.register("discounts", self.create_discounts_screen)
+        self.router.register("cart", self.create_cart_screen, on_show=self.update_cart_view)
+        if self.metrics is not None:
+            self.metrics.instrument(self.router, "show", "screen_switch")
+            self.metrics.instrument(self.images, "decode", "image_decode")
+        self.router.show("main")
+
+        self.first_frame_pending = True
+        self.bind("<Expose>", self.on_expose, add="+")
+
+    def load_catalog_and_cart(self):
+        # индекс поиска строится в потоке поиска при первом запросе, если его нет в снимке каталога
+        self.search_index = None
+        source = find_catalog_file(self.catalog_path) if self.catalog_path else None
+        if source and (self.shared_dir or source.endswith(BUNDLE_EXTENSION)):
+            # готовый снимок (свой или общий для нескольких киосков) отображается в память без разбора
+            self.catalog, self.search_index = build_snapshot(source, self.shared_dir)
+        elif source:
+            # файл отслеживается и может быть переписан на месте, поэтому отображать его в память нельзя
+            self.catalog = load_catalog(source, copy=True)
+        else:
+            self.catalog = create_default_catalog()
+        if source:
+            def report(line_number, message):
+                print(f"{source}:{line_number}: {message}", file=sys.stderr)
+
+            for line_number, message in self.catalog.errors:
+                report(line_number, message)
+            # повторы артикулов и штрихкодов в отложенных категориях находятся позже, при их разборе
+            self.catalog.on_error = report
+        self.cart = Cart(self.catalog)
+        self.pricing = self.cart.pricing
+        self.cart.subscribe(self.update_cart_view)
+        # корзина переживает падение киоска: восстанавливаем ее из журнала и дальше пишем каждое изменение
+        # киоски с общим снимком стоят на одной машине: без явного ключа различаем их по дисплею
+        instance = INSTANCE or (os.environ.get("DISPLAY") if self.shared_dir else None)
+        if self.shared_dir and not instance:
+            # без ключа соседние киоски писали бы в один журнал; свой журнал процесса
+            # не восстановится после перезапуска, поэтому об этом предупреждаем
+            instance = f"pid{os.getpid()}"
+            print(f"KIOSK_INSTANCE и DISPLAY не заданы, журнал корзины: {journal_path(instance)}", file=sys.stderr)
+        self.journal = CartJournal(journal_path(instance))
+        self.cart.apply_basket(self.journal.recover())
+        self.journal.open()
+        self.journal.attach(self.cart)
+        self.scanner = BarcodeScanner(self, self.cart, on_scanned=self.on_barcodes_scanned)
+        self.bind_all("<KeyPress>", self.scanner.on_key, add="+")
+
+        # каталог из файла обновляется на лету: цены и наличие меняются в течение дня
+        if self.catalog_path:
+            self.refresher = CatalogRefresher(self, self.catalog_path, self.swap_catalog, shared_dir=self.shared_dir)
+            self.refresher.start()
+
+        for button in self.catalog_buttons:
+            button.configure(state="normal")
+
+    def on_expose(self, event):
+        # окно впервые показано; отметка ставится после перерисовки, которая уже стоит в очереди idle
+        if self.first_frame_pending:
+            self.first_frame_pending = False
+            self.after_idle(self.on_first_frame)
+
+    def on_first_frame(self):
+        self.startup.mark("first_frame")
+        if self.catalog is None:
+            self.load_catalog_and_cart()
+        self.images.prefetch([*self.product_images.values(), *self.promotion_images.values()])
+        self.after_idle(self.on_interactive)
+
+    def on_interactive(self):
+        self.startup.mark("interactive")
+        self.startup.write()
 
     def create_main_screen(self):
         self.main_frame = ctk.CTkFrame(self, fg_color="#1f358b")
-        self.main_frame.pack(fill="both", expand=True)
 
-        background_label = ctk.CTkLabel(self.main_frame, image=self.background_image, text="")
+        background_label = ctk.CTkLabel(self.main_frame, text="")
+        self.images.load_into(background_label, *self.background_image)
         background_label.place(relx=0.5, rely=0.5, anchor="center")
 
+        # Tk обрабатывает нажатия раньше after_idle, поэтому в быстром режиме кнопка может сработать
+        # до загрузки каталога; такие кнопки включаются в конце load_catalog_and_cart
         buttons = [
-            ("Продукты", self.open_products_screen),
-            ("Скидки и акции", self.open_discounts_screen),
-            ("Корзина", self.open_cart_screen),
-            ("Помощь", self.show_help_message),
-            ("Выход", self.confirm_exit)
+            ("Продукты", self.open_products_screen, True),
+            ("Скидки и акции", self.open_discounts_screen, True),
+            ("Корзина", self.open_cart_screen, True),
+            ("Помощь", self.show_help_message, False),
+            ("Выход", self.confirm_exit, False)
         ]
 
         y_position = 0.33
-        for text, command in buttons:
+        for text, command, needs_catalog in buttons:
             button = ctk.CTkButton(
                 self.main_frame,
                 text=text,
@@ -84,14 +243,19 @@ class App(ctk.CTk):
                 height=50,
                 command=command
             )
+            if needs_catalog and self.catalog is None:
+                button.configure(state="disabled")
+                self.catalog_buttons.append(button)
             button.place(relx=0.5, rely=y_position, anchor="center")
             y_position += 0.1
 
+        return self.main_frame
+
     def open_products_screen(self):
-        self.main_frame.pack_forget()
+        self.router.show("products")
 
+    def create_products_screen(self):
         self.products_frame = ctk.CTkFrame(self, fg_color="#1f358b")
-        self.products_frame.pack(fill="both", expand=True)
 
         back_button = ctk.CTkButton(
             self.products_frame,
@@ -109,29 +273,12 @@ class App(ctk.CTk):
 
         self.search_entry = ctk.CTkEntry(self.products_frame, placeholder_text="Поиск...", width=300)
         self.search_entry.place(relx=0.5, rely=0.2, anchor="center")
-        self.search_entry.bind("<KeyRelease>", self.update_products_list)
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
 
-        category_frame = ctk.CTkFrame(self.products_frame, fg_color="#1f358b")
-        category_frame.place(relx=0.5, rely=0.5, anchor="center")
+        self.products_view = VirtualProductList(self.products_frame, self.add_to_cart, self.remove_from_cart)
 
-        for i, (text, image) in enumerate(self.product_images.items()):
-            button = ctk.CTkButton(
-                category_frame,
-                text=text,
-                image=image,
-                font=("Arial", 16),
-                corner_radius=10,
-                fg_color="#ffd600",
-                hover_color="orange",
-                text_color="black",
-                width=150,
-                height=150,
-                compound="top",
-                command=lambda t=text: self.show_category_products(t)
-            )
-            row = i // 2
-            col = i % 2
-            button.grid(row=row, column=col, padx=10, pady=10)
+        self.category_frame = None
+        self.create_category_buttons()
 
         cart_button = ctk.CTkButton(
             self.products_frame,
@@ -148,90 +295,177 @@ class App(ctk.CTk):
         cart_button.place(relx=0.5, rely=0.9, anchor="center")
 
         self.products_frame.bind("<Button-1>", self.hide_products_list)
+        return self.products_frame
+
+    def create_category_buttons(self):
+        # кнопки строятся по категориям каталога, картинка есть только у встроенных;
+        # если категорий больше четырех, сетка прокручивается
+        if self.category_frame is not None:
+            self.category_frame.destroy()
+        categories = self.catalog.category_names()
+        if len(categories) > 4:
+            self.category_frame = ctk.CTkScrollableFrame(self.products_frame, fg_color="#1f358b", width=340, height=340)
+        else:
+            self.category_frame = ctk.CTkFrame(self.products_frame, fg_color="#1f358b")
+        self.category_frame.place(relx=0.5, rely=0.5, anchor="center")
 
-    def show_category_products(self, category):
-        self.current_products = self.products_list[category]
-        self.update_products_list(None)
-
-    def update_products_list(self, event):
-        if hasattr(self, 'products_canvas'):
-            self.products_canvas.destroy()
-
-        query = self.search_entry.get().lower() if event else ""
-
-        self.products_canvas = ctk.CTkCanvas(self.products_frame, bg="#1f358b", width=300, height=300)
-        self.products_canvas.place(relx=0.5, rely=0.43, anchor="center")
-
-        y_position = 10
-        products_to_show = self.current_products if not query else [
-            product for product in self.all_products if query in product["name"].lower()
-        ]
-
-        for product in products_to_show:
-            self.products_canvas.create_text(120, y_position,
-                                             text=f"{product['name']} - {product['quantity']} | {product['price']}",
-                                             fill="white", font=("Arial", 14))
-
-            add_button = ctk.CTkButton(
-                self.products_canvas,
-                text="+",
-                font=("Arial", 14),
-                corner_radius=10,
-                fg_color="#ffd600",
-                hover_color="orange",
-                text_color="black",
-                width=30,
-                height=20,
-                command=lambda p=product["name"]: self.add_to_cart(p)
-            )
-            remove_button = ctk.CTkButton(
-                self.products_canvas,
-                text="-",
-                font=("Arial", 14),
+        for i, text in enumerate(categories):
+            button = ctk.CTkButton(
+                self.category_frame,
+                text=text,
+                font=("Arial", 16),
                 corner_radius=10,
                 fg_color="#ffd600",
                 hover_color="orange",
                 text_color="black",
-                width=30,
-                height=20,
-                command=lambda p=product["name"]: self.remove_from_cart(p)
+                width=150,
+                height=150,
+                compound="top",
+                command=lambda t=text: self.show_category_products(t)
             )
+            image = self.product_images.get(text)
+            if image:
+                self.images.load_into(button, *image)
+            row = i // 2
+            col = i % 2
+            button.grid(row=row, column=col, padx=10, pady=10)
 
-            self.products_canvas.create_window((265, y_position - 8), window=add_button, anchor="ne")
-            self.products_canvas.create_window((300, y_position + 14), window=remove_button, anchor="se")
+    def show_category_products(self, category):
+        self.current_category = category
+        self.current_products = self.catalog.category_products(category)
+        self.update_products_list(None)
+
+    def schedule_search(self, event):
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.search_delay, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        query = self.search_entry.get()
+        if not query:
+            self.update_products_list(None)
+            return
+
+        self.search_generation += 1
+        self.search_pending += 1
+        self.search_executor.submit(self.search_worker, self.search_generation, query)
+        if self.search_poll_job is None:
+            self.search_poll_job = self.after(SEARCH_POLL_MS, self.poll_search_results)
+
+    def search_worker(self, generation, query):
+        # ответ кладется в очередь при любом исходе, иначе search_pending не вернется к нулю
+        products = None
+        try:
+            if generation == self.search_generation:
+                catalog, search_index = self.catalog, self.search_index
+                if search_index is None:
+                    search_index = SearchIndex(catalog.materialize_all())
+                    # пока индекс строился, каталог могли заменить новым снимком со своим индексом
+                    if self.catalog is catalog:
+                        self.search_index = search_index
+                products = search_index.search(query)
+        except Exception as error:
+            print(f"поиск {query!r} не выполнен: {error!r}", file=sys.stderr)
+        finally:
+            self.search_results.put((generation, products))
+
+    def poll_search_results(self):
+        self.search_poll_job = None
+        latest = None
+        while True:
+            try:
+                generation, products = self.search_results.get_nowait()
+            except queue.Empty:
+                break
+            self.search_pending -= 1
+            if generation == self.search_generation and products is not None:
+                latest = products
+
+        if latest is not None:
+            self.show_products(latest)
+        if self.search_pending:
+            self.search_poll_job = self.after(SEARCH_POLL_MS, self.poll_search_results)
+
+    def update_products_list(self, event):
+        # отменяем запросы, которые еще выполняются
+        self.search_generation += 1
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+            self.search_job = None
+        self.show_products(self.current_products)
 
-            y_position += 40
+    def show_products(self, products):
+        self.products_view.set_products(products)
+        self.products_view.place(relx=0.5, rely=0.43, anchor="center")
 
         self.products_frame.bind("<Button-1>", self.check_click_outside)
 
     def check_click_outside(self, event):
-        if hasattr(self, 'products_canvas'):
+        if hasattr(self, 'products_view'):
             try:
+                view = self.products_view.frame
                 canvas_coords = (
-                    self.products_canvas.winfo_rootx(),
-                    self.products_canvas.winfo_rooty(),
-                    self.products_canvas.winfo_rootx() + self.products_canvas.winfo_width(),
-                    self.products_canvas.winfo_rooty() + self.products_canvas.winfo_height()
+                    view.winfo_rootx(),
+                    view.winfo_rooty(),
+                    view.winfo_rootx() + view.winfo_width(),
+                    view.winfo_rooty() + view.winfo_height()
                 )
 
                 if not (canvas_coords[0] <= event.x_root <= canvas_coords[2] and canvas_coords[1] <= event.y_root <=
                         canvas_coords[3]):
-                    self.products_canvas.destroy()
+                    self.products_view.hide()
                     self.products_frame.unbind("<Button-1>")
             except Exception as e:
-                self.products_canvas.destroy()
+                self.products_view.hide()
                 self.products_frame.unbind("<Button-1>")
 
     def hide_products_list(self, event):
-        if hasattr(self, 'products_canvas') and not self.products_canvas.winfo_containing(event.x_root, event.y_root):
-            self.products_canvas.destroy()
+        if hasattr(self, 'products_view') and not self.products_view.frame.winfo_containing(event.x_root, event.y_root):
+            self.products_view.hide()
             self.products_frame.unbind("<Button-1>")
 
+    def swap_catalog(self, catalog, search_index):
+        # новый снимок от CatalogRefresher; прежний возвращается, чтобы его освободил фоновый поток
+        previous = self.catalog, self.search_index
+        # результаты поиска по старому снимку уже не нужны
+        self.search_generation += 1
+        self.catalog = catalog
+        self.search_index = search_index
+        mapping = self.cart.rebind(catalog)
+
+        if hasattr(self, 'cart_scrollable_frame'):
+            rows = {}
+            for item, row in self.cart_labels.items():
+                row["id"] = mapping[item]
+                rows[row["id"]] = row
+            self.cart_labels = rows
+            self.update_cart_view()
+
+        # категория в новом снимке берется целиком, это ленивая последовательность без перебора строк;
+        # по артикулам переносятся только результаты поиска, их не больше лимита выдачи
+        previous_products = self.current_products
+        if self.current_category is not None:
+            self.current_products = catalog.category_products(self.current_category)
+        if hasattr(self, 'products_view'):
+            shown = self.products_view.products
+            if shown is previous_products:
+                shown = self.current_products
+            else:
+                shown = [catalog.get_by_sku(product.sku) for product in shown]
+                shown = [product for product in shown if product is not None]
+            self.products_view.replace_products(shown)
+            self.create_category_buttons()
+        # плитки акций хранят цены и суммы наборов старого снимка, а акция на товар,
+        # появившийся только сейчас, без пересборки не покажется
+        self.router.invalidate("discounts")
+        return previous
+
     def open_discounts_screen(self):
-        self.main_frame.pack_forget()
+        self.router.show("discounts")
 
+    def create_discounts_screen(self):
         self.discounts_frame = ctk.CTkFrame(self, fg_color="#1f358b")
-        self.discounts_frame.pack(fill="both", expand=True)
 
         back_button = ctk.CTkButton(
             self.discounts_frame,
@@ -247,36 +481,54 @@ class App(ctk.CTk):
         )
         back_button.place(relx=0.05, rely=0.05, anchor="nw")
 
-        title_label = ctk.CTkLabel(self.discounts_frame, text="Скидки -25%", font=("Arial", 24, "bold"), text_color="white")
-        title_label.place(relx=0.5, rely=0.15, anchor="center")
-
-        discount_label = ctk.CTkLabel(self.discounts_frame, image=self.discount_image, text="SNIKERS\n89.99₽", compound="top", font=("Arial", 16), text_color="black", fg_color="#ffd600", corner_radius=10)
-        discount_label.place(relx=0.5, rely=0.30, anchor="center")
-
-        add_to_cart_button_snickers = ctk.CTkButton(
-            self.discounts_frame,
-            text="Добавить в корзину",
-            font=("Arial", 14),
-            corner_radius=10,
-            fg_color="#ffd600",
-            hover_color="orange",
-            text_color="black",
-            width=150,
-            height=30,
-            command=lambda: self.add_to_cart("Сникерс")
-        )
-        add_to_cart_button_snickers.place(relx=0.5, rely=0.43, anchor="center")
-
-        promo_label = ctk.CTkLabel(self.discounts_frame, text="Акция 1 + 1 Киндеры", font=("Arial", 24, "bold"), text_color="white")
-        promo_label.place(relx=0.5, rely=0.55, anchor="center")
-
-        promo_image_label1 = ctk.CTkLabel(self.discounts_frame, image=self.promo_image, text="", corner_radius=10)
-        promo_image_label1.place(relx=0.25, rely=0.65, anchor="center")
-
-        promo_image_label2 = ctk.CTkLabel(self.discounts_frame, image=self.promo_image, text="", corner_radius=10)
-        promo_image_label2.place(relx=0.75, rely=0.65, anchor="center")
-
-        add_to_cart_button_kinder = ctk.CTkButton(
+        # каждой акции своя полоса экрана, тексты и цены берутся из правил акций;
+        # акции на товары, которых нет в каталоге, не показываются
+        promotions = []
+        for promotion in self.pricing.promotions.values():
+            product = self.catalog.get_by_sku(promotion["sku"])
+            if product is not None:
+                promotions.append((promotion, product))
+        band = 0.8 / max(len(promotions), 2)
+        for index, (promotion, product) in enumerate(promotions):
+            self.create_promotion_tile(promotion, product, 0.1 + index * band, band / 0.4)
+        if not promotions:
+            empty_label = ctk.CTkLabel(self.discounts_frame, text="Сейчас акций нет", font=("Arial", 24, "bold"), text_color="white")
+            empty_label.place(relx=0.5, rely=0.5, anchor="center")
+        return self.discounts_frame
+
+    def create_promotion_tile(self, promotion, product, top, scale):
+        sku = product.sku
+        rule = self.pricing.rules[sku]
+        image = self.promotion_images.get(sku)
+
+        def place(widget, relx, offset):
+            widget.place(relx=relx, rely=top + offset * scale, anchor="center")
+
+        title_label = ctk.CTkLabel(self.discounts_frame, text=promotion["title"], font=("Arial", 24, "bold"), text_color="white")
+        place(title_label, 0.5, 0.05)
+
+        if rule.quantity == 1:
+            price = format_price(rule.line_total(1, product.price), ".")
+            discount_label = ctk.CTkLabel(self.discounts_frame, text=f"{product.name}\n{price}", compound="top", font=("Arial", 16), text_color="black", fg_color="#ffd600", corner_radius=10)
+            if image:
+                self.images.load_into(discount_label, *image)
+            place(discount_label, 0.5, 0.20)
+        else:
+            # комплект: картинка на каждую штуку через плюс и цена всего комплекта
+            step = 0.5 / (rule.quantity - 1)
+            for position in range(rule.quantity):
+                promo_image_label = ctk.CTkLabel(self.discounts_frame, text="", corner_radius=10)
+                if image:
+                    self.images.load_into(promo_image_label, *image)
+                place(promo_image_label, 0.25 + position * step, 0.15)
+                if position:
+                    plus_label = ctk.CTkLabel(self.discounts_frame, text="+", font=("Arial", 30, "bold"), text_color="white")
+                    place(plus_label, 0.25 + (position - 0.5) * step, 0.15)
+
+            price_label = ctk.CTkLabel(self.discounts_frame, text=f"= {format_price(rule.line_total(rule.quantity, product.price))}", font=("Arial", 24, "bold"), text_color="white")
+            place(price_label, 0.49, 0.25)
+
+        add_to_cart_button = ctk.CTkButton(
             self.discounts_frame,
             text="Добавить в корзину",
             font=("Arial", 14),
@@ -286,26 +538,15 @@ class App(ctk.CTk):
             text_color="black",
             width=150,
             height=30,
-            command=lambda: self.add_to_cart("Киндер", is_promo=True)
+            command=lambda: self.add_promotion_to_cart(sku, rule.quantity > 1)
         )
-        add_to_cart_button_kinder.place(relx=0.5, rely=0.83, anchor="center")
-
-        plus_label = ctk.CTkLabel(self.discounts_frame, text="+", font=("Arial", 30, "bold"), text_color="white")
-        plus_label.place(relx=0.5, rely=0.65, anchor="center")
-
-        price_label = ctk.CTkLabel(self.discounts_frame, text="= 259,99₽", font=("Arial", 24, "bold"), text_color="white")
-        price_label.place(relx=0.49, rely=0.75, anchor="center")
+        place(add_to_cart_button, 0.5, 0.33)
 
     def open_cart_screen(self):
-        if hasattr(self, 'products_frame'):
-            self.products_frame.pack_forget()
-        if hasattr(self, 'discounts_frame'):
-            self.discounts_frame.pack_forget()
-        if hasattr(self, 'main_frame'):
-            self.main_frame.pack_forget()
+        self.router.show("cart")
 
+    def create_cart_screen(self):
         self.cart_frame = ctk.CTkFrame(self, fg_color="#1f358b")
-        self.cart_frame.pack(fill="both", expand=True)
 
         back_button = ctk.CTkButton(
             self.cart_frame,
@@ -329,57 +570,13 @@ class App(ctk.CTk):
         self.cart_scrollable_frame.place(relx=0.5, rely=0.5, anchor="center")
 
         self.cart_labels = {}
-        for item, quantity in self.cart.items():
-            price_text = f"{quantity['price']} за шт."
-            if item == "Киндер" and quantity['count'] % 2 == 0:
-                price_text = "259,99₽ за 2 шт."
-
-            item_frame = ctk.CTkFrame(self.cart_scrollable_frame, fg_color="transparent")
-            item_frame.pack(fill="x", pady=5)
-
-            item_label = ctk.CTkLabel(item_frame, text=f"{item} - {quantity['quantity']} | {price_text}",
-                                      font=("Arial", 18), text_color="white")
-            item_label.grid(row=0, column=0, sticky="w")
-
-            add_button = ctk.CTkButton(
-                item_frame,
-                text="+",
-                font=("Arial", 14),
-                corner_radius=10,
-                fg_color="#ffd600",
-                hover_color="orange",
-                text_color="black",
-                width=30,
-                height=20,
-                command=lambda i=item: self.increase_quantity(i)
-            )
-            remove_button = ctk.CTkButton(
-                item_frame,
-                text="-",
-                font=("Arial", 14),
-                corner_radius=10,
-                fg_color="#ffd600",
-                hover_color="orange",
-                text_color="black",
-                width=30,
-                height=20,
-                command=lambda i=item: self.decrease_quantity(i)
-            )
-
-            quantity_label = ctk.CTkLabel(item_frame, text=str(quantity['count']), font=("Arial", 18), text_color="white")
-            quantity_label.grid(row=0, column=1, padx=10)
-
-            add_button.grid(row=0, column=2, padx=5)
-            remove_button.grid(row=0, column=3, padx=5)
-
-            self.cart_labels[item] = {"item_label": item_label, "quantity_label": quantity_label}
+        self.total_label = ctk.CTkLabel(self.cart_frame, text="", font=("Arial", 20, "bold"), text_color="white")
+        self.total_label.place(relx=0.5, rely=0.85, anchor="center")
 
-        total_price = self.calculate_total_price()
-        total_label = ctk.CTkLabel(self.cart_frame, text=f"Итого: {total_price:.2f}₽", font=("Arial", 20, "bold"),
-                                   text_color="white")
-        total_label.place(relx=0.5, rely=0.85, anchor="center")
+        self.payment_status = ctk.CTkLabel(self.cart_frame, text="", font=("Arial", 14), text_color="white")
+        self.payment_status.place(relx=0.5, rely=0.77, anchor="center")
 
-        pay_button = ctk.CTkButton(
+        self.pay_button = ctk.CTkButton(
             self.cart_frame,
             text="Оплатить",
             font=("Arial", 18),
@@ -391,140 +588,201 @@ class App(ctk.CTk):
             height=50,
             command=self.proceed_to_payment
         )
-        pay_button.place(relx=0.5, rely=0.92, anchor="center")
-
-    def add_to_cart(self, item_name, is_promo=False):
-        for product in self.all_products:
-            if product["name"] == item_name:
-                if item_name in self.cart:
-                    self.cart[item_name]['count'] += 1
-                else:
-                    self.cart[item_name] = {**product, 'count': 1}
-                if is_promo and item_name == "Киндер":
-                    self.cart[item_name]['count'] += 1  # Добавляем сразу 2 штуки для акции
-                messagebox.showinfo("Корзина", f"{item_name} добавлен в корзину!")
-                break
-
-    def remove_from_cart(self, item_name):
-        if item_name in self.cart and self.cart[item_name]['count'] > 1:
-            self.cart[item_name]['count'] -= 1
-            messagebox.showinfo("Корзина", f"Количество {item_name} уменьшено в корзине!")
-        elif item_name in self.cart:
-            del self.cart[item_name]
-            messagebox.showinfo("Корзина", f"{item_name} удален из корзины!")
-            self.update_cart_view()
+        self.pay_button.place(relx=0.5, rely=0.92, anchor="center")
+        return self.cart_frame
 
-    def increase_quantity(self, item_name):
-        if item_name in self.cart:
-            self.cart[item_name]['count'] += 1
-            messagebox.showinfo("Корзина", f"Количество {item_name} увеличено в корзине!")
-            self.cart_labels[item_name]["quantity_label"].configure(text=str(self.cart[item_name]['count']))
-            self.update_total_price()
-
-    def decrease_quantity(self, item_name):
-        if item_name in self.cart:
-            if self.cart[item_name]['count'] > 1:
-                self.cart[item_name]['count'] -= 1
-                messagebox.showinfo("Корзина", f"Количество {item_name} уменьшено в корзине!")
+    def add_to_cart(self, product_id, is_promo=False):
+        product = self.catalog.get(product_id)
+        if is_promo:
+            self.cart.add_promo(product_id)  # по акции добавляем сразу весь комплект
+        else:
+            self.cart.add(product_id)
+        self.toasts.show(f"{product.name} добавлен в корзину!", key=("added", product.id))
+
+    def add_promotion_to_cart(self, sku, is_promo):
+        # экран акций кэшируется, а каталог за это время мог обновиться без этого товара
+        product = self.catalog.get_by_sku(sku)
+        if product is None:
+            self.toasts.show("Товара по акции больше нет в продаже", key=("missing", sku))
+            return
+        self.add_to_cart(product.id, is_promo=is_promo)
+
+    def remove_from_cart(self, product_id):
+        if product_id in self.cart:
+            product = self.catalog.get(product_id)
+            if self.cart.remove(product_id):
+                self.toasts.show(f"Количество {product.name} уменьшено в корзине!", key=("decreased", product.id))
             else:
-                del self.cart[item_name]
-                messagebox.showinfo("Корзина", f"{item_name} удален из корзины!")
-            self.update_cart_view()
+                self.toasts.show(f"{product.name} удален из корзины!", key=("removed", product.id))
+
+    def increase_quantity(self, product_id):
+        if product_id in self.cart:
+            product = self.catalog.get(product_id)
+            self.cart.add(product_id)
+            self.toasts.show(f"Количество {product.name} увеличено в корзине!", key=("increased", product.id))
+
+    def decrease_quantity(self, product_id):
+        self.remove_from_cart(product_id)
+
+    def on_barcodes_scanned(self, products, unknown):
+        if len(products) == 1:
+            self.toasts.show(f"{products[0].name} добавлен в корзину!", key=("added", products[0].id))
+        elif products:
+            self.toasts.show(f"Отсканировано товаров: {len(products)}")
+        for code in unknown:
+            self.toasts.show(f"Штрихкод {code} не найден", key=("unknown", code))
+
+    def cart_row_text(self, product, count):
+        price_text = self.pricing.price_text(product, count)
+        return f"{product.name} - {product.quantity} | {price_text}"
+
+    def create_cart_row(self, item):
+        # id строки меняется при замене каталога, поэтому кнопки берут его из row
+        row = {"id": item, "text": None, "count": None}
+        item_frame = ctk.CTkFrame(self.cart_scrollable_frame, fg_color="transparent")
+        item_frame.pack(fill="x", pady=5)
+
+        item_label = ctk.CTkLabel(item_frame, text="", font=("Arial", 18), text_color="white")
+        item_label.grid(row=0, column=0, sticky="w")
+
+        add_button = ctk.CTkButton(
+            item_frame,
+            text="+",
+            font=("Arial", 14),
+            corner_radius=10,
+            fg_color="#ffd600",
+            hover_color="orange",
+            text_color="black",
+            width=30,
+            height=20,
+            command=lambda: self.increase_quantity(row["id"])
+        )
+        remove_button = ctk.CTkButton(
+            item_frame,
+            text="-",
+            font=("Arial", 14),
+            corner_radius=10,
+            fg_color="#ffd600",
+            hover_color="orange",
+            text_color="black",
+            width=30,
+            height=20,
+            command=lambda: self.decrease_quantity(row["id"])
+        )
 
-    def update_cart_view(self):
-        for label in self.cart_labels.values():
-            label["item_label"].destroy()
-            label["quantity_label"].destroy()
+        quantity_label = ctk.CTkLabel(item_frame, text="", font=("Arial", 18), text_color="white")
+        quantity_label.grid(row=0, column=1, padx=10)
 
-        for widget in self.cart_scrollable_frame.winfo_children():
-            widget.destroy()
+        add_button.grid(row=0, column=2, padx=5)
+        remove_button.grid(row=0, column=3, padx=5)
 
-        self.cart_labels.clear()
-        for item, quantity in self.cart.items():
-            price_text = f"{quantity['price']} за шт."
-            if item == "Киндер" and quantity['count'] % 2 == 0:
-                price_text = "259,99₽ за 2 шт."
+        row.update(frame=item_frame, item_label=item_label, quantity_label=quantity_label)
+        return row
 
-            item_frame = ctk.CTkFrame(self.cart_scrollable_frame, fg_color="transparent")
-            item_frame.pack(fill="x", pady=5)
+    def update_cart_view(self, changed=None):
+        # сверяем строки с корзиной и трогаем только те, что поменялись;
+        # changed приходит из событий корзины, без него сверяется вся корзина
+        if not hasattr(self, 'cart_scrollable_frame'):
+            return
 
-            item_label = ctk.CTkLabel(item_frame, text=f"{item} - {quantity['quantity']} | {price_text}",
-                                      font=("Arial", 18), text_color="white")
-            item_label.grid(row=0, column=0, sticky="w")
+        if changed is None:
+            changed = [item for item in self.cart_labels if item not in self.cart]
+            changed.extend(item for item, _ in self.cart.items())
 
-            add_button = ctk.CTkButton(
-                item_frame,
-                text="+",
-                font=("Arial", 14),
-                corner_radius=10,
-                fg_color="#ffd600",
-                hover_color="orange",
-                text_color="black",
-                width=30,
-                height=20,
-                command=lambda i=item: self.increase_quantity(i)
-            )
-            remove_button = ctk.CTkButton(
-                item_frame,
-                text="-",
-                font=("Arial", 14),
-                corner_radius=10,
-                fg_color="#ffd600",
-                hover_color="orange",
-                text_color="black",
-                width=30,
-                height=20,
-                command=lambda i=item: self.decrease_quantity(i)
-            )
+        for item in changed:
+            count = self.cart.count(item)
+            row = self.cart_labels.get(item)
+            if not count:
+                if row is not None:
+                    self.cart_labels.pop(item)["frame"].destroy()
+                continue
 
-            quantity_label = ctk.CTkLabel(item_frame, text=str(quantity['count']), font=("Arial", 18),
-                                          text_color="white")
-            quantity_label.grid(row=0, column=1, padx=10)
+            if row is None:
+                row = self.cart_labels[item] = self.create_cart_row(item)
 
-            add_button.grid(row=0, column=2, padx=5)
-            remove_button.grid(row=0, column=3, padx=5)
-
-            self.cart_labels[item] = {"item_label": item_label, "quantity_label": quantity_label}
+            text = self.cart_row_text(self.catalog.get(item), count)
+            if row["text"] != text:
+                row["item_label"].configure(text=text)
+                row["text"] = text
+            if row["count"] != count:
+                row["quantity_label"].configure(text=str(count))
+                row["count"] = count
 
         self.update_total_price()
 
     def calculate_total_price(self):
-        total_price = 0
-        for item, quantity in self.cart.items():
-            if item == "Киндер" and quantity['count'] % 2 == 0:
-                total_price += (quantity['count'] // 2) * 259.99
-            else:
-                total_price += quantity['count'] * float(quantity['price'].replace('₽', '').replace(',', '.'))
-        return total_price
+        return self.pricing.total_amount()
 
     def update_total_price(self):
         total_price = self.calculate_total_price()
-        total_label = ctk.CTkLabel(self.cart_frame, text=f"Итого: {total_price:.2f}₽", font=("Arial", 20, "bold"), text_color="white")
-        total_label.place(relx=0.5, rely=0.85, anchor="center")
+        self.total_label.configure(text=f"Итого: {total_price:.2f}₽")
 
     def proceed_to_payment(self):
-        webbrowser.open("https://example.com/payment")
+        if self.payment_future is not None:
+            return
+        if not len(self.cart):
+            self.toasts.show("Корзина пуста")
+            return
+
+        if self.payments is None:
+            from payment import PaymentService
+            self.payments = PaymentService()
+        items = [{"sku": self.catalog.get(item).sku, "count": count} for item, count in self.cart.items()]
+        # строки заказа запоминаем в момент оплаты: пока идет платеж, корзину еще можно менять
+        self.payment_lines = []
+        for item, count in self.cart.items():
+            product = self.catalog.get(item)
+            self.payment_lines.append((product.sku, product.category, count,
+                                       self.pricing.line_totals[item], count * product.price))
+        self.payment_future = self.payments.pay(self.pricing.total, items,
+                                                on_progress=lambda *event: self.payment_events.put(event))
+        self.pay_button.configure(state="disabled")
+        self.payment_status.configure(text="Оплата...")
+        self.after(PAYMENT_POLL_MS, self.poll_payment)
+
+    def poll_payment(self):
+        while True:
+            try:
+                stage, detail = self.payment_events.get_nowait()
+            except queue.Empty:
+                break
+            if stage == "attempt" and detail > 1:
+                self.payment_status.configure(text=f"Оплата... попытка {detail}")
+            elif stage == "retry":
+                self.payment_status.configure(text=f"Повтор: {detail}")
+
+        if not self.payment_future.done():
+            self.after(PAYMENT_POLL_MS, self.poll_payment)
+            return
+
+        from payment import PaymentError
+
+        future, self.payment_future = self.payment_future, None
+        self.pay_button.configure(state="normal")
+        try:
+            future.result()
+        except PaymentError as error:
+            self.payment_status.configure(text=str(error))
+            return
+        self.payment_status.configure(text="")
+        if self.orders is None:
+            from orders import OrderLog
+            self.orders = OrderLog()
+        self.orders.append(self.payment_lines)
+        # из корзины уходит только оплаченное: добавленное во время платежа остается в ней
+        with self.cart.batch():
+            for sku, _, count, _, _ in self.payment_lines:
+                product = self.catalog.get_by_sku(sku)
+                if product is not None and product.id in self.cart:
+                    self.cart.remove(product.id, count)
+        self.payment_lines = None
+        self.toasts.show("Оплата прошла успешно")
 
     def back_to_previous_screen(self):
-        if hasattr(self, 'products_frame'):
-            self.cart_frame.pack_forget()
-            self.products_frame.pack(fill="both", expand=True)
-        elif hasattr(self, 'discounts_frame'):
-            self.cart_frame.pack_forget()
-            self.discounts_frame.pack(fill="both", expand=True)
-        else:
-            self.cart_frame.pack_forget()
-            self.create_main_screen()
+        self.router.back()
 
     def back_to_main_screen(self):
-        if hasattr(self, 'products_frame'):
-            self.products_frame.pack_forget()
-        if hasattr(self, 'discounts_frame'):
-            self.discounts_frame.pack_forget()
-        if hasattr(self, 'cart_frame'):
-            self.cart_frame.pack_forget()
-
-        self.create_main_screen()
+        self.router.home("main")
 
     def show_help_message(self):
         messagebox.showinfo(
@@ -532,11 +790,20 @@ class App(ctk.CTk):
             "Если у вас возникли вопросы, напишите нам письмо на адрес lentasupport@gmail.ru или по телефону +78005553535"
         )
 
+    def destroy(self):
+        if self.refresher is not None:
+            self.refresher.stop()
+        if self.journal is not None:
+            self.journal.close()
+        if self.orders is not None:
+            self.orders.close()
+        super().destroy()
+
     def confirm_exit(self):
         answer = messagebox.askquestion("Подтверждение", "Вы точно хотите выйти?")
         if answer == 'yes':
             self.destroy()
 
 if __name__ == "__main__":
-    app = App()
+    app = App(sys.argv[1] if len(sys.argv) > 1 else None)
     app.mainloop()
@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import threading
+
+JOURNAL_PATH = os.environ.get("KIOSK_CART_JOURNAL", "cart.journal")
+# ключ киоска, когда на одной машине их несколько (например, с общим снимком каталога)
+INSTANCE = os.environ.get("KIOSK_INSTANCE")
+FLUSH_INTERVAL = 0.05
+COMPACT_RECORDS = 10_000
+
+
+def journal_path(instance=INSTANCE, path=JOURNAL_PATH):
+    # у каждого киоска свой журнал: cart.journal -> cart-<ключ>.journal
+    if not instance:
+        return path
+    root, extension = os.path.splitext(path)
+    key = re.sub(r"[^\w.-]", "_", instance)
+    return f"{root}-{key}{extension}"
+
+
+class CartJournal:
+    # Журнал операций корзины: записи «артикул<TAB>количество» копятся в памяти,
+    # фоновый поток пишет их пачкой и делает один fsync на пачку (group commit).
+    # Время от времени состояние сворачивается в снимок, а журнал обнуляется
+    def __init__(self, path=JOURNAL_PATH, flush_interval=FLUSH_INTERVAL, compact_records=COMPACT_RECORDS):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.flush_interval = flush_interval
+        self.compact_records = compact_records
+        self.lock = threading.Lock()
+        self.pending = []
+        self.state = {}
+        self.records = 0
+        self.file = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def recover(self):
+        state = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as file:
+                state.update(json.load(file))
+
+        records = 0
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    # последняя строка могла оборваться при сбое питания
+                    if not line.endswith("\n"):
+                        break
+                    sku, _, count = line.rstrip("\n").rpartition("\t")
+                    if not sku or not count.isdigit():
+                        continue
+                    records += 1
+                    if count == "0":
+                        state.pop(sku, None)
+                    else:
+                        state[sku] = int(count)
+
+        self.state = state
+        self.records = records
+        return dict(state)
+
+    def open(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self.run, name="cart-journal", daemon=True)
+        self.thread.start()
+
+    def attach(self, cart):
+        def record(changed):
+            for product_id in changed:
+                self.record(cart.catalog.get(product_id).sku, cart.count(product_id))
+
+        cart.subscribe(record)
+
+    def record(self, sku, count):
+        with self.lock:
+            self.pending.append(f"{sku}\t{count}\n")
+
+    def run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        self.file.write("".join(pending))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        for line in pending:
+            sku, _, count = line.rstrip("\n").rpartition("\t")
+            if count == "0":
+                self.state.pop(sku, None)
+            else:
+                self.state[sku] = int(count)
+        self.records += len(pending)
+        if self.records >= self.compact_records:
+            self.compact()
+
+    def compact(self):
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.state, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.snapshot_path)
+        # если упадем здесь, повторное применение старого журнала к снимку даст то же состояние
+        self.file.truncate(0)
+        self.file.seek(0)
+        self.records = 0
+
+    def close(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,153 @@
+import csv
+import json
+import mmap
+import os
+from array import array
+
+from catalog import Catalog
+from pricing import parse_price
+
+FIELDS = ("sku", "name", "quantity", "price", "category", "barcode")
+REQUIRED_FIELDS = ("sku", "name", "quantity", "price")
+
+
+class CatalogFile:
+    # Файл читается через mmap: при загрузке запоминаются только смещения строк по категориям,
+    # сами товары разбираются при первом обращении к категории. Файл, который могут перезаписать
+    # на месте (его отслеживает CatalogRefresher), читается в память копией: у отображения
+    # обрезанный файл дает SIGBUS, а переписанный — чужие строки по старым смещениям
+    def __init__(self, path, file_format=None, copy=False):
+        self.path = path
+        self.format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+        if self.format not in ("csv", "jsonl"):
+            raise ValueError(f"Неизвестный формат каталога: {path}")
+
+        self.file = open(path, "rb")
+        if copy:
+            self.mmap = self.file.read()
+        else:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        self.header = None
+        self.errors = []
+        self.offsets = {}
+        # артикул и штрихкод -> категория: товар находится разбором только его категории.
+        # Заодно повторы отсеиваются в порядке файла, и ленивая загрузка оставляет те же
+        # товары, что и полная, какую бы категорию ни открыли первой
+        self.skus = {}
+        self.barcodes = {}
+
+    def close(self):
+        if isinstance(self.mmap, mmap.mmap):
+            self.mmap.close()
+        self.file.close()
+
+    def parse_line(self, line):
+        text = line.decode("utf-8").rstrip("\r\n")
+        if self.format == "jsonl":
+            row = json.loads(text)
+            if not isinstance(row, dict):
+                raise ValueError("строка не является объектом")
+        else:
+            fields = next(csv.reader([text]))
+            if len(fields) != len(self.header):
+                raise ValueError(f"ожидалось полей: {len(self.header)}, получено: {len(fields)}")
+            row = dict(zip(self.header, fields))
+
+        values = {}
+        for field in FIELDS:
+            value = row.get(field)
+            # в JSONL цена или артикул могут прийти числом
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            elif value is not None and not isinstance(value, str):
+                raise ValueError(f"поле {field} должно быть строкой")
+            values[field] = value or None
+        for field in REQUIRED_FIELDS:
+            if not values[field]:
+                raise ValueError(f"нет поля {field}")
+        try:
+            parse_price(values["price"])
+        except ValueError:
+            raise ValueError(f"неверная цена: {values['price']}")
+        return values
+
+    def lines(self):
+        data = self.mmap
+        position = 0
+        line_number = 0
+        size = len(data)
+        while position < size:
+            end = data.find(b"\n", position)
+            end = size if end == -1 else end + 1
+            line_number += 1
+            yield line_number, position, data[position:end]
+            position = end
+
+    def scan(self):
+        lines = self.lines()
+        if self.format == "csv":
+            for line_number, _, line in lines:
+                self.header = next(csv.reader([line.decode("utf-8-sig").strip()]))
+                break
+            missing = [field for field in REQUIRED_FIELDS if field not in (self.header or ())]
+            if missing:
+                self.errors.append((1, f"в заголовке нет полей: {', '.join(missing)}"))
+                return
+
+        for line_number, position, line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = self.parse_line(line)
+            except Exception as error:
+                # плохая строка не должна обрывать загрузку всего каталога
+                self.errors.append((line_number, str(error)))
+                continue
+            category = row["category"]
+            sku, barcode = row["sku"], row["barcode"]
+            if sku in self.skus:
+                self.errors.append((line_number, f"Артикул {sku} уже есть в каталоге"))
+                continue
+            if barcode and barcode in self.barcodes:
+                self.errors.append((line_number, f"Штрихкод {barcode} уже есть в каталоге"))
+                continue
+            self.skus[sku] = category
+            if barcode:
+                self.barcodes[barcode] = category
+            positions = self.offsets.get(category)
+            if positions is None:
+                positions = self.offsets[category] = array("Q")
+            positions.append(line_number)
+            positions.append(position)
+
+    def rows(self, category, on_error):
+        positions = self.offsets.pop(category)
+        data = self.mmap
+
+        def read():
+            for index in range(0, len(positions), 2):
+                position = positions[index + 1]
+                end = data.find(b"\n", position)
+                try:
+                    row = self.parse_line(data[position:None if end == -1 else end])
+                except Exception as error:
+                    on_error(positions[index], str(error))
+                    continue
+                del row["category"]
+                yield positions[index], row
+
+        return read
+
+
+def load_catalog(path, file_format=None, copy=False):
+    catalog_file = CatalogFile(path, file_format, copy)
+    catalog_file.scan()
+
+    catalog = Catalog()
+    catalog.source = catalog_file
+    catalog.errors.extend(catalog_file.errors)
+    catalog.pending_skus = catalog_file.skus
+    catalog.pending_barcodes = catalog_file.barcodes
+    for category in list(catalog_file.offsets):
+        catalog.pending[category] = catalog_file.rows(category, catalog.report)
+    return catalog
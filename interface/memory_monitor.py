@@ -0,0 +1,110 @@
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+MEMORY_INTERVAL_MS = 60_000
+TOP_ALLOCATIONS = 10
+
+
+def current_rss():
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def count_widgets(root):
+    counts = {}
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        for child in widget.children.values():
+            name = type(child).__name__
+            counts[name] = counts.get(name, 0) + 1
+            stack.append(child)
+    return counts
+
+
+def count_images():
+    import customtkinter as ctk
+
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, ctk.CTkImage))
+
+
+class MemoryMonitor:
+    # Периодические снимки памяти киоска: живые виджеты по классам, CTkImage, RSS
+    # и top-N мест, где выросли аллокации (tracemalloc) с прошлого снимка
+    def __init__(self, master, path=None, interval_ms=MEMORY_INTERVAL_MS, top=TOP_ALLOCATIONS):
+        self.master = master
+        self.path = path
+        self.interval_ms = interval_ms
+        self.top = top
+        self.previous = None
+        self.previous_trace = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self):
+        self.master.after(self.interval_ms, self.tick)
+
+    def tick(self):
+        self.report(self.snapshot())
+        self.master.after(self.interval_ms, self.tick)
+
+    def snapshot(self):
+        gc.collect()
+        trace = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        top = []
+        if self.previous_trace is not None:
+            for stat in trace.compare_to(self.previous_trace, "lineno")[:self.top]:
+                frame = stat.traceback[0]
+                top.append({"where": f"{frame.filename}:{frame.lineno}", "size_diff": stat.size_diff,
+                            "count_diff": stat.count_diff})
+        self.previous_trace = trace
+
+        return {
+            "time": time.time(),
+            "rss": current_rss(),
+            "traced": tracemalloc.get_traced_memory()[0],
+            "widgets": count_widgets(self.master),
+            "images": count_images(),
+            "top_allocations": top,
+        }
+
+    def growth(self, before, after):
+        widgets = {name: after["widgets"].get(name, 0) - before["widgets"].get(name, 0)
+                   for name in {**before["widgets"], **after["widgets"]}}
+        return {
+            "rss": (after["rss"] or 0) - (before["rss"] or 0),
+            "traced": after["traced"] - before["traced"],
+            "widgets": {name: diff for name, diff in widgets.items() if diff},
+            "widgets_total": sum(after["widgets"].values()) - sum(before["widgets"].values()),
+            "images": after["images"] - before["images"],
+        }
+
+    def report(self, snapshot):
+        record = dict(snapshot)
+        if self.previous is not None:
+            record["growth"] = self.growth(self.previous, snapshot)
+        self.previous = snapshot
+
+        line = json.dumps(record, ensure_ascii=False)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        else:
+            print(line, file=sys.stderr)
+        return record
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+import tkinter
+
+METRICS_INTERVAL_MS = 10_000
+HEARTBEAT_MS = 100
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+class WidgetCounter:
+    # считает создание и удаление всех tk-виджетов, включая внутренние виджеты customtkinter
+    created = 0
+    destroyed = 0
+    installed = False
+
+    @classmethod
+    def install(cls):
+        if cls.installed:
+            return
+        cls.installed = True
+        original_init = tkinter.BaseWidget.__init__
+        original_destroy = tkinter.BaseWidget.destroy
+
+        def init(widget, *args, **kwargs):
+            cls.created += 1
+            original_init(widget, *args, **kwargs)
+
+        def destroy(widget):
+            cls.destroyed += 1
+            original_destroy(widget)
+
+        tkinter.BaseWidget.__init__ = init
+        tkinter.BaseWidget.destroy = destroy
+
+
+class Metrics:
+    # Включается явно (KIOSK_METRICS=путь); выключенные метрики ничего не оборачивают и ничего не стоят
+    def __init__(self, master, path, interval_ms=METRICS_INTERVAL_MS):
+        self.master = master
+        self.path = path
+        self.interval_ms = interval_ms
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.event_lag = {}
+        self.widgets_created = {}
+        self.widgets_destroyed = {}
+        self.loop_lag = Histogram()
+        # смещение между часами X-сервера (event.time) и perf_counter, берется минимальное
+        self.clock_offset = None
+
+        WidgetCounter.install()
+        self.heartbeat_expected = time.perf_counter() + HEARTBEAT_MS / 1000
+        self.master.after(HEARTBEAT_MS, self.heartbeat)
+        self.master.after(self.interval_ms, self.export_periodically)
+
+    def histogram(self, family, name):
+        histogram = family.get(name)
+        if histogram is None:
+            histogram = family[name] = Histogram()
+        return histogram
+
+    def observe(self, name, elapsed_ms, created=0, destroyed=0):
+        with self.lock:
+            self.histogram(self.latency, name).observe(elapsed_ms)
+            if created:
+                self.widgets_created[name] = self.widgets_created.get(name, 0) + created
+            if destroyed:
+                self.widgets_destroyed[name] = self.widgets_destroyed.get(name, 0) + destroyed
+
+    def observe_event(self, name, event):
+        now_ms = time.perf_counter() * 1000
+        offset = now_ms - event.time
+        if self.clock_offset is None or offset < self.clock_offset:
+            self.clock_offset = offset
+        with self.lock:
+            self.histogram(self.event_lag, name).observe(offset - self.clock_offset)
+
+    def instrument(self, target, method, name=None):
+        name = name or method
+        original = getattr(target, method)
+        main_thread = threading.main_thread()
+
+        def wrapper(*args, **kwargs):
+            if args and isinstance(getattr(args[0], "time", None), int):
+                self.observe_event(name, args[0])
+            counted = threading.current_thread() is main_thread
+            created, destroyed = WidgetCounter.created, WidgetCounter.destroyed
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if counted:
+                    self.observe(name, elapsed_ms, WidgetCounter.created - created,
+                                 WidgetCounter.destroyed - destroyed)
+                else:
+                    self.observe(name, elapsed_ms)
+
+        setattr(target, method, wrapper)
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        with self.lock:
+            self.loop_lag.observe(max(0.0, (now - self.heartbeat_expected) * 1000))
+        self.heartbeat_expected = now + HEARTBEAT_MS / 1000
+        self.master.after(HEARTBEAT_MS, self.heartbeat)
+
+    def export_periodically(self):
+        self.export()
+        self.master.after(self.interval_ms, self.export_periodically)
+
+    def snapshot(self):
+        def histograms(family):
+            return {name: {"buckets": dict(histogram.cumulative()), "sum": round(histogram.sum, 3),
+                           "count": histogram.count}
+                    for name, histogram in family.items()}
+
+        with self.lock:
+            return {
+                "handler_latency_ms": histograms(self.latency),
+                "event_lag_ms": histograms(self.event_lag),
+                "loop_lag_ms": histograms({"mainloop": self.loop_lag})["mainloop"],
+                "widgets_created": dict(self.widgets_created),
+                "widgets_destroyed": dict(self.widgets_destroyed),
+            }
+
+    def prometheus(self, data):
+        lines = []
+
+        def histogram(metric, name, values):
+            label = f'handler="{name}"' if name else ""
+            for bound, count in values["buckets"].items():
+                lines.append(f'{metric}_bucket{{{label + "," if label else ""}le="{bound}"}} {count}')
+            suffix = f"{{{label}}}" if label else ""
+            lines.append(f"{metric}_sum{suffix} {values['sum']}")
+            lines.append(f"{metric}_count{suffix} {values['count']}")
+
+        for metric, family in (("kiosk_handler_latency_ms", "handler_latency_ms"), ("kiosk_event_lag_ms", "event_lag_ms")):
+            lines.append(f"# TYPE {metric} histogram")
+            for name, values in data[family].items():
+                histogram(metric, name, values)
+        lines.append("# TYPE kiosk_loop_lag_ms histogram")
+        histogram("kiosk_loop_lag_ms", None, data["loop_lag_ms"])
+        for metric, family in (("kiosk_widgets_created_total", "widgets_created"),
+                               ("kiosk_widgets_destroyed_total", "widgets_destroyed")):
+            lines.append(f"# TYPE {metric} counter")
+            for name, value in data[family].items():
+                lines.append(f'{metric}{{handler="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        data = self.snapshot()
+        if self.path.endswith(".json"):
+            text = json.dumps(data, ensure_ascii=False, indent=2)
+        else:
+            text = self.prometheus(data)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary, self.path)
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from pricing import PROMOTIONS, format_price
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+ORDER_LOG_DIR = os.environ.get("KIOSK_ORDER_LOG", "orders")
+DICTIONARY = "skus.tsv"
+LOCK = "orders.lock"
+# колонка -> код типа array/numpy; строки одной корзины имеют один номер заказа
+COLUMNS = (
+    ("order", "Q"),
+    ("time", "q"),
+    ("sku", "I"),
+    ("count", "I"),
+    ("amount", "q"),
+    ("list_amount", "q"),
+)
+TOP_SKUS = 10
+
+
+def day_name(timestamp):
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+def column_path(directory, day, name):
+    return os.path.join(directory, day, name + ".col")
+
+
+def read_dictionary(directory, offset=0):
+    # артикулы кодируются номерами строк словаря; неполная последняя строка отбрасывается.
+    # С offset читаются только строки, дописанные после этого места
+    path = os.path.join(directory, DICTIONARY)
+    entries = []
+    size = offset
+    if os.path.exists(path):
+        with open(path, "rb") as file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                sku, _, category = line.decode("utf-8").rstrip("\n").partition("\t")
+                entries.append((sku, category or None))
+                size += len(line)
+    return entries, size
+
+
+def column_rows(directory, day):
+    # колонки пишутся по очереди, после сбоя полной считается только общая часть
+    rows = None
+    for name, typecode in COLUMNS:
+        path = column_path(directory, day, name)
+        count = os.path.getsize(path) // array(typecode).itemsize if os.path.exists(path) else 0
+        rows = count if rows is None else min(rows, count)
+    return rows
+
+
+class OrderLog:
+    # Оплаченные корзины построчно, каждое поле в своем файле (по колонке на файл, папка на день).
+    # Запись идет в фоновом потоке, отчеты читают колонки через numpy.memmap без разбора строк.
+    # В одну папку могут писать несколько киосков: каждая запись идет под flock, и под ним же
+    # дочитывается словарь и заново берутся число строк и последний номер заказа с диска
+    def __init__(self, directory=ORDER_LOG_DIR):
+        self.directory = directory
+        self.codes = None
+        self.dictionary = None
+        self.dictionary_size = 0
+        self.lock = None
+        self.day = None
+        self.files = {}
+        self.next_order = 1
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def append(self, lines, timestamp=None):
+        # строки: (артикул, категория, количество, сумма к оплате, сумма без скидок), суммы в копейках
+        timestamp = time.time() if timestamp is None else timestamp
+        return self.executor.submit(self.write, list(lines), timestamp)
+
+    def open_dictionary(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.codes = {}
+        self.dictionary_size = 0
+        self.dictionary = open(os.path.join(self.directory, DICTIONARY), "ab")
+        self.lock = open(os.path.join(self.directory, LOCK), "a")
+
+    def sync_dictionary(self):
+        # дочитываем артикулы, которые с прошлой записи добавили другие киоски
+        entries, size = read_dictionary(self.directory, self.dictionary_size)
+        for sku, _ in entries:
+            self.codes[sku] = len(self.codes)
+        self.dictionary_size = size
+        # хвост без перевода строки остался от упавшей записи, под блокировкой его можно срезать
+        self.dictionary.truncate(size)
+
+    def open_day(self, day):
+        for file in self.files.values():
+            file.close()
+        os.makedirs(os.path.join(self.directory, day), exist_ok=True)
+        self.files = {name: open(column_path(self.directory, day, name), "ab") for name, _ in COLUMNS}
+        self.day = day
+
+    def sync_day(self):
+        # колонки после сбоя срезаются до общей части, номер заказа продолжает последний на диске
+        rows = column_rows(self.directory, self.day)
+        for name, typecode in COLUMNS:
+            self.files[name].truncate(rows * array(typecode).itemsize)
+
+        self.next_order = 1
+        if rows:
+            last = array("Q")
+            with open(column_path(self.directory, self.day, "order"), "rb") as file:
+                file.seek((rows - 1) * last.itemsize)
+                last.fromfile(file, 1)
+            self.next_order = last[0] + 1
+
+    def write(self, lines, timestamp):
+        if self.codes is None:
+            self.open_dictionary()
+        if fcntl is not None:
+            fcntl.flock(self.lock, fcntl.LOCK_EX)
+        try:
+            return self.write_locked(lines, timestamp)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.lock, fcntl.LOCK_UN)
+
+    def write_locked(self, lines, timestamp):
+        self.sync_dictionary()
+        day = day_name(timestamp)
+        if day != self.day:
+            self.open_day(day)
+        self.sync_day()
+
+        new_entries = []
+        for sku, category, *_ in lines:
+            if sku not in self.codes:
+                self.codes[sku] = len(self.codes)
+                new_entries.append(f"{sku}\t{category or ''}\n")
+        # словарь пишется раньше колонок, чтобы в колонках не было кодов без артикула
+        if new_entries:
+            encoded = "".join(new_entries).encode("utf-8")
+            self.dictionary.write(encoded)
+            self.dictionary.flush()
+            os.fsync(self.dictionary.fileno())
+            self.dictionary_size += len(encoded)
+
+        order = self.next_order
+        self.next_order += 1
+        values = {
+            "order": [order] * len(lines),
+            "time": [int(timestamp)] * len(lines),
+            "sku": [self.codes[line[0]] for line in lines],
+            "count": [line[2] for line in lines],
+            "amount": [line[3] for line in lines],
+            "list_amount": [line[4] for line in lines],
+        }
+        for name, typecode in COLUMNS:
+            file = self.files[name]
+            array(typecode, values[name]).tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+        return order
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+        if self.dictionary is not None:
+            self.dictionary.close()
+            self.dictionary = None
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+
+
+def daily_report(directory=ORDER_LOG_DIR, day=None, top=TOP_SKUS, promotions=PROMOTIONS):
+    import numpy as np
+
+    day = day or day_name(time.time())
+    rows = column_rows(directory, day) if os.path.isdir(os.path.join(directory, day)) else 0
+    columns = {}
+    for name, typecode in COLUMNS:
+        if rows:
+            columns[name] = np.memmap(column_path(directory, day, name), dtype=typecode, mode="r", shape=(rows,))
+        else:
+            columns[name] = np.zeros(0, dtype=typecode)
+
+    entries, _ = read_dictionary(directory)
+    skus = [sku for sku, _ in entries]
+    category_names = sorted({category or "" for _, category in entries})
+    category_codes = {name: code for code, name in enumerate(category_names)}
+    sku_category = np.array([category_codes[category or ""] for _, category in entries], dtype=np.intp)
+
+    order, sku, count = columns["order"], columns["sku"], columns["count"]
+    amount, list_amount = columns["amount"], columns["list_amount"]
+    # номера заказов за день только растут, поэтому число заказов считается без сортировки
+    orders = int(np.count_nonzero(np.diff(order))) + 1 if rows else 0
+
+    revenue_by_category = np.bincount(sku_category[sku], weights=amount, minlength=len(category_names))
+    revenue_by_sku = np.bincount(sku, weights=amount, minlength=len(skus))
+    units_by_sku = np.bincount(sku, weights=count, minlength=len(skus))
+    top_codes = [code for code in np.argsort(revenue_by_sku, kind="stable")[::-1][:top] if revenue_by_sku[code] > 0]
+
+    promo_report = []
+    codes = {sku_value: code for code, sku_value in enumerate(skus)}
+    for promotion in promotions:
+        code = codes.get(promotion["sku"])
+        mask = sku == code if code is not None else np.zeros(rows, dtype=bool)
+        applied = mask & (amount < list_amount)
+        promo_orders = int(np.unique(order[applied]).size)
+        promo_report.append({
+            "sku": promotion["sku"],
+            "title": promotion.get("title", ""),
+            "orders_with_sku": int(np.unique(order[mask]).size),
+            "orders_with_promo": promo_orders,
+            "uptake": round(promo_orders / orders, 4) if orders else 0.0,
+            "units": int(count[mask].sum()),
+            "discount": int((list_amount[mask] - amount[mask]).sum()),
+        })
+
+    return {
+        "day": day,
+        "orders": orders,
+        "lines": rows,
+        "revenue": int(amount.sum()),
+        "revenue_by_category": {name or "без категории": int(round(value))
+                                for name, value in zip(category_names, revenue_by_category) if value},
+        "promotions": promo_report,
+        "top_skus": [{"sku": skus[code], "revenue": int(round(revenue_by_sku[code])),
+                      "units": int(round(units_by_sku[code]))} for code in top_codes],
+    }
+
+
+def print_report(report):
+    print(f"Отчет за {report['day']}: заказов {report['orders']}, строк {report['lines']}, "
+          f"выручка {format_price(report['revenue'])}")
+    print("\nВыручка по категориям:")
+    for name, revenue in sorted(report["revenue_by_category"].items(), key=lambda item: -item[1]):
+        print(f"  {name}: {format_price(revenue)}")
+    print("\nАкции:")
+    for promotion in report["promotions"]:
+        print(f"  {promotion['title'] or promotion['sku']}: в {promotion['orders_with_promo']} заказах "
+              f"({promotion['uptake']:.1%}), продано {promotion['units']} шт., "
+              f"скидка {format_price(promotion['discount'])}")
+    print(f"\nТоп-{len(report['top_skus'])} артикулов по выручке:")
+    for position, item in enumerate(report["top_skus"], 1):
+        print(f"  {position}. {item['sku']}: {format_price(item['revenue'])}, {item['units']} шт.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчет по продажам за день")
+    parser.add_argument("--dir", default=ORDER_LOG_DIR, help="папка журнала заказов")
+    parser.add_argument("--date", help="день в формате ГГГГ-ММ-ДД, по умолчанию сегодня")
+    parser.add_argument("--top", type=int, default=TOP_SKUS, help="сколько артикулов показать")
+    parser.add_argument("--json", action="store_true", help="вывести отчет в JSON")
+    args = parser.parse_args()
+
+    try:
+        report = daily_report(args.dir, args.date, args.top)
+    except ImportError:
+        sys.exit("Для отчетов нужен numpy: pip install numpy")
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
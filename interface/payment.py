@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import threading
+import uuid
+from urllib.parse import urlsplit
+
+PAYMENT_URL = os.environ.get("PAYMENT_URL", "http://127.0.0.1:8765/payments")
+PAYMENT_TIMEOUT = 5.0
+PAYMENT_RETRIES = 3
+RETRY_DELAY = 0.3
+POOL_SIZE = 2
+
+
+class PaymentError(Exception):
+    pass
+
+
+class RetryableError(PaymentError):
+    pass
+
+
+class PaymentClient:
+    # Клиент HTTP/1.1 поверх asyncio: держит открытые keep-alive соединения со шлюзом,
+    # повторяет запрос при сбоях с тем же ключом идемпотентности
+    def __init__(self, url=PAYMENT_URL, timeout=PAYMENT_TIMEOUT, retries=PAYMENT_RETRIES, pool_size=POOL_SIZE):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https"
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.idle = []
+
+    async def connect(self):
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def release(self, connection, keep_alive):
+        if keep_alive and len(self.idle) < self.pool_size:
+            self.idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def request(self, body, idempotency_key):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Idempotency-Key: {idempotency_key}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("ascii")
+
+        connection = await self.connect()
+        reader, writer = connection
+        try:
+            writer.write(head + payload)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                raise RetryableError("шлюз закрыл соединение")
+            status = int(status_line.split()[1])
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            data = await reader.readexactly(int(headers.get("content-length", 0)))
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as error:
+            writer.close()
+            raise RetryableError(f"ошибка соединения: {error}") from error
+        except asyncio.CancelledError:
+            writer.close()
+            raise
+
+        self.release(connection, headers.get("connection", "keep-alive").lower() != "close")
+        if status >= 500 or status == 429:
+            raise RetryableError(f"шлюз ответил {status}")
+        try:
+            result = json.loads(data or b"{}")
+        except ValueError as error:
+            raise PaymentError(f"шлюз ответил {status}, ответ не разобран: {error}") from error
+        if not isinstance(result, dict):
+            raise PaymentError(f"шлюз ответил {status}, ответ не является объектом")
+        if status >= 400:
+            raise PaymentError(str(result.get("error", f"шлюз ответил {status}")))
+        return result
+
+    async def pay(self, amount, items, on_progress=None):
+        # один ключ на все попытки: шлюз не спишет деньги дважды
+        idempotency_key = str(uuid.uuid4())
+        body = {"amount": amount, "currency": "RUB", "items": items}
+
+        for attempt in range(1, self.retries + 1):
+            if on_progress is not None:
+                on_progress("attempt", attempt)
+            try:
+                return await asyncio.wait_for(self.request(body, idempotency_key), self.timeout)
+            except (RetryableError, asyncio.TimeoutError, OSError) as error:
+                if attempt == self.retries:
+                    raise PaymentError(f"оплата не прошла: {str(error) or 'таймаут'}") from error
+                if on_progress is not None:
+                    on_progress("retry", str(error) or "таймаут")
+                await asyncio.sleep(RETRY_DELAY * attempt)
+
+    async def close(self):
+        while self.idle:
+            self.idle.pop()[1].close()
+
+
+class PaymentService:
+    # Свой цикл asyncio в фоновом потоке рядом с mainloop Tk
+    def __init__(self, client=None):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="payments", daemon=True)
+        self.thread.start()
+        self.client = client or PaymentClient()
+
+    def pay(self, amount, items, on_progress=None):
+        return asyncio.run_coroutine_threadsafe(self.client.pay(amount, items, on_progress), self.loop)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
@@ -0,0 +1,116 @@
+import re
+from decimal import Decimal
+
+# акции описываются данными, цены в копейках считаются один раз при загрузке каталога
+PROMOTIONS = [
+    {"type": "percent", "sku": "2001", "percent": 25, "title": "Скидки -25%"},
+    {"type": "bundle", "sku": "2002", "quantity": 2, "price": "259,99₽", "title": "Акция 1 + 1 Киндеры"},
+]
+
+# рубли и не больше двух знаков копеек, знак и лишние цифры не принимаются
+PRICE_PATTERN = re.compile(r"([0-9]+)(?:[.,]([0-9]{1,2}))?")
+
+
+def parse_price(text):
+    match = PRICE_PATTERN.fullmatch(text.replace('₽', '').strip())
+    if match is None:
+        raise ValueError(f"Неверная цена: {text!r}")
+    rubles, kopecks = match.groups()
+    return int(rubles) * 100 + int((kopecks or "").ljust(2, "0"))
+
+
+def format_price(kopecks, separator=","):
+    rubles, kopecks = divmod(kopecks, 100)
+    if not kopecks:
+        return f"{rubles}₽"
+    return f"{rubles}{separator}{kopecks:02d}₽"
+
+
+class BundleRule:
+    def __init__(self, promotion):
+        self.quantity = promotion["quantity"]
+        self.price = parse_price(promotion["price"])
+
+    def line_total(self, count, unit_price):
+        bundles, rest = divmod(count, self.quantity)
+        return bundles * self.price + rest * unit_price
+
+    def price_text(self, count, unit_price):
+        if count < self.quantity:
+            return None
+        return f"{format_price(self.price)} за {self.quantity} шт."
+
+
+class NPlusMRule:
+    def __init__(self, promotion):
+        self.paid = promotion["buy"]
+        self.quantity = promotion["buy"] + promotion["free"]
+
+    def line_total(self, count, unit_price):
+        groups, rest = divmod(count, self.quantity)
+        return (groups * self.paid + rest) * unit_price
+
+    def price_text(self, count, unit_price):
+        if count < self.quantity:
+            return None
+        return f"{format_price(unit_price)} за шт., {self.paid} + {self.quantity - self.paid}"
+
+
+class PercentRule:
+    def __init__(self, promotion):
+        self.percent = promotion["percent"]
+        self.quantity = 1
+
+    def line_total(self, count, unit_price):
+        return (count * unit_price * (100 - self.percent) + 50) // 100
+
+    def price_text(self, count, unit_price):
+        return f"{format_price(self.line_total(1, unit_price))} за шт. (-{self.percent}%)"
+
+
+RULE_TYPES = {
+    "bundle": BundleRule,
+    "n_plus_m": NPlusMRule,
+    "percent": PercentRule,
+}
+
+
+def compile_promotions(promotions):
+    return {promotion["sku"]: RULE_TYPES[promotion["type"]](promotion) for promotion in promotions}
+
+
+class Pricing:
+    def __init__(self, promotions=PROMOTIONS):
+        self.promotions = {promotion["sku"]: promotion for promotion in promotions}
+        self.rules = compile_promotions(promotions)
+        self.line_totals = {}
+        self.total = 0
+
+    def line_total(self, product, count):
+        rule = self.rules.get(product.sku)
+        if rule is None:
+            return count * product.price
+        return rule.line_total(count, product.price)
+
+    def set_count(self, product, count):
+        old_total = self.line_totals.pop(product.id, 0)
+        new_total = 0
+        if count > 0:
+            new_total = self.line_totals[product.id] = self.line_total(product, count)
+        self.total += new_total - old_total
+
+    def reset(self):
+        self.line_totals.clear()
+        self.total = 0
+
+    def total_amount(self):
+        return Decimal(self.total) / 100
+
+    def promo_quantity(self, product):
+        rule = self.rules.get(product.sku)
+        return rule.quantity if rule is not None else 1
+
+    def price_text(self, product, count):
+        rule = self.rules.get(product.sku)
+        text = rule.price_text(count, product.price) if rule is not None else None
+        return text or f"{product.price_text} за шт."
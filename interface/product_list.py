@@ -0,0 +1,141 @@
+import customtkinter as ctk
+
+ROW_HEIGHT = 40
+OVERSCAN = 2
+
+
+class _Row:
+    __slots__ = ("product", "text", "text_id", "add_button", "remove_button", "add_window", "remove_window")
+
+
+class VirtualProductList:
+    # Виджеты создаются только для видимых строк, при прокрутке строки переиспользуются
+    def __init__(self, master, on_add, on_remove, width=300, height=300):
+        self.on_add = on_add
+        self.on_remove = on_remove
+        self.height = height
+        self.products = []
+        self.offset = 0
+
+        self.frame = ctk.CTkFrame(master, fg_color="#1f358b")
+        self.canvas = ctk.CTkCanvas(self.frame, bg="#1f358b", width=width, height=height)
+        self.canvas.pack(side="left")
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self.on_mouse_wheel)
+
+        self.rows = [self._create_row() for _ in range(height // ROW_HEIGHT + 1 + OVERSCAN)]
+
+    def _create_row(self):
+        row = _Row()
+        row.product = None
+        row.text = None
+        row.text_id = self.canvas.create_text(120, 0, text="", fill="white", font=("Arial", 14), state="hidden")
+
+        row.add_button = ctk.CTkButton(
+            self.canvas,
+            text="+",
+            font=("Arial", 14),
+            corner_radius=10,
+            fg_color="#ffd600",
+            hover_color="orange",
+            text_color="black",
+            width=30,
+            height=20
+        )
+        row.remove_button = ctk.CTkButton(
+            self.canvas,
+            text="-",
+            font=("Arial", 14),
+            corner_radius=10,
+            fg_color="#ffd600",
+            hover_color="orange",
+            text_color="black",
+            width=30,
+            height=20
+        )
+
+        row.add_window = self.canvas.create_window((265, 0), window=row.add_button, anchor="ne", state="hidden")
+        row.remove_window = self.canvas.create_window((300, 0), window=row.remove_button, anchor="se", state="hidden")
+        return row
+
+    def set_products(self, products):
+        self.products = products
+        self.offset = 0
+        self.render()
+
+    def replace_products(self, products):
+        # новый снимок каталога: позиция прокрутки сохраняется, перерисовываются только изменившиеся строки
+        self.products = products
+        self.offset = min(self.offset, max(0, self.content_height() - self.height))
+        self.render()
+
+    def content_height(self):
+        return len(self.products) * ROW_HEIGHT
+
+    def render(self):
+        first = self.offset // ROW_HEIGHT
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            items = (row.text_id, row.add_window, row.remove_window)
+
+            if index >= len(self.products):
+                if row.product is not None:
+                    row.product = None
+                    for item in items:
+                        self.canvas.itemconfigure(item, state="hidden")
+                continue
+
+            product = self.products[index]
+            if row.product is not product:
+                if row.product is None:
+                    for item in items:
+                        self.canvas.itemconfigure(item, state="normal")
+                text = f"{product.name} - {product.quantity} | {product.price_text}"
+                if row.text != text:
+                    self.canvas.itemconfigure(row.text_id, text=text)
+                    row.text = text
+                if row.product is None or row.product.id != product.id:
+                    row.add_button.configure(command=lambda p=product.id: self.on_add(p))
+                    row.remove_button.configure(command=lambda p=product.id: self.on_remove(p))
+                row.product = product
+
+            y_position = 10 + index * ROW_HEIGHT - self.offset
+            self.canvas.coords(row.text_id, 120, y_position)
+            self.canvas.coords(row.add_window, 265, y_position - 8)
+            self.canvas.coords(row.remove_window, 300, y_position + 14)
+
+        content_height = self.content_height()
+        if content_height <= self.height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / content_height, (self.offset + self.height) / content_height)
+
+    def scroll_to(self, offset):
+        max_offset = max(0, self.content_height() - self.height)
+        offset = int(min(max(offset, 0), max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.content_height())
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else ROW_HEIGHT
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.yview("scroll", -1, "units")
+        else:
+            self.yview("scroll", 1, "units")
+
+    def place(self, **kwargs):
+        self.frame.place(**kwargs)
+
+    def hide(self):
+        self.frame.place_forget()
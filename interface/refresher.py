@@ -0,0 +1,122 @@
+import os
+import queue
+import sys
+import threading
+
+from loader import load_catalog
+from search import SearchIndex
+from shared_catalog import BUNDLE_EXTENSION, open_bundle, open_shared_catalog
+
+REFRESH_INTERVAL = 2.0
+POLL_MS = 200
+CATALOG_EXTENSIONS = (".csv", ".jsonl")
+
+
+def find_catalog_file(path):
+    # в папке берется самый свежий файл каталога
+    if not os.path.isdir(path):
+        return path
+    files = [os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(CATALOG_EXTENSIONS)]
+    return max(files, key=os.path.getmtime, default=None)
+
+
+def build_snapshot(path, shared_dir=None):
+    # каталог разбирается целиком, после этого снимок только читается;
+    # с общим снимком файл разбирает только один киоск на машине
+    if path.endswith(BUNDLE_EXTENSION):
+        return open_bundle(path)
+    if shared_dir:
+        return open_shared_catalog(path, shared_dir)
+    catalog = load_catalog(path, copy=True)
+    catalog.materialize_all()
+    catalog.source.close()
+    catalog.source = None
+    return catalog, SearchIndex(catalog.products)
+
+
+class CatalogRefresher:
+    # Фоновый поток следит за файлом (или папкой) каталога. Новый каталог вместе с индексами
+    # собирается вне потока интерфейса, а интерфейс через after() получает уже готовый снимок.
+    # Старый снимок возвращается сюда же, чтобы сотни тысяч объектов освобождались не в mainloop
+    def __init__(self, master, path, on_swap, interval=REFRESH_INTERVAL, shared_dir=None):
+        self.master = master
+        self.path = path
+        self.shared_dir = shared_dir
+        self.on_swap = on_swap
+        self.interval = interval
+        self.ready = queue.Queue()
+        self.retired = queue.Queue()
+        self.signature = self.stat()
+        self.candidate = self.signature
+        self.stopped = threading.Event()
+        self.thread = None
+        self.poll_job = None
+
+    def stat(self):
+        source = find_catalog_file(self.path)
+        try:
+            stat = os.stat(source)
+        except (OSError, TypeError):
+            return None
+        return source, stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="catalog-refresher", daemon=True)
+        self.thread.start()
+        self.poll_job = self.master.after(POLL_MS, self.poll)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.release_retired()
+            signature = self.stat()
+            if signature is None or signature == self.signature:
+                continue
+            # файл могут еще дописывать: перечитываем, только когда он не менялся целый интервал
+            if signature != self.candidate:
+                self.candidate = signature
+                continue
+
+            source = signature[0]
+            try:
+                catalog, search_index = build_snapshot(source, self.shared_dir)
+            except (OSError, ValueError) as error:
+                print(f"{source}: каталог не обновлен: {error}", file=sys.stderr)
+                self.signature = signature
+                continue
+            for line_number, message in catalog.errors:
+                print(f"{source}:{line_number}: {message}", file=sys.stderr)
+            self.signature = signature
+            if not len(catalog):
+                print(f"{source}: каталог пуст, оставляем прежний", file=sys.stderr)
+                continue
+            self.ready.put((catalog, search_index))
+
+    def release_retired(self):
+        while True:
+            try:
+                self.retired.get_nowait()
+            except queue.Empty:
+                break
+
+    def poll(self):
+        latest = None
+        while True:
+            try:
+                snapshot = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            if latest is not None:
+                self.retired.put(latest)
+            latest = snapshot
+        if latest is not None:
+            self.retired.put(self.on_swap(*latest))
+        self.poll_job = self.master.after(POLL_MS, self.poll)
+
+    def stop(self):
+        if self.poll_job is not None:
+            self.master.after_cancel(self.poll_job)
+            self.poll_job = None
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,52 @@
+class ScreenRouter:
+    # Каждый экран строится один раз при первом переходе, дальше фреймы только меняются местами
+    def __init__(self):
+        self.builders = {}
+        self.on_show = {}
+        self.screens = {}
+        self.history = []
+        self.current = None
+
+    def register(self, name, builder, on_show=None):
+        self.builders[name] = builder
+        if on_show is not None:
+            self.on_show[name] = on_show
+
+    def screen(self, name):
+        frame = self.screens.get(name)
+        if frame is None:
+            frame = self.screens[name] = self.builders[name]()
+        return frame
+
+    def invalidate(self, name):
+        # экран на виду пересобирается сразу, остальные при следующем переходе
+        frame = self.screens.pop(name, None)
+        if frame is None:
+            return
+        if name == self.current:
+            self.screen(name).pack(fill="both", expand=True)
+        frame.destroy()
+
+    def show(self, name, remember=True):
+        if name == self.current:
+            return
+        frame = self.screen(name)
+
+        if self.current is not None:
+            self.screens[self.current].pack_forget()
+            if remember:
+                self.history.append(self.current)
+        frame.pack(fill="both", expand=True)
+        self.current = name
+
+        callback = self.on_show.get(name)
+        if callback is not None:
+            callback()
+
+    def back(self):
+        if self.history:
+            self.show(self.history.pop(), remember=False)
+
+    def home(self, name):
+        self.history.clear()
+        self.show(name, remember=False)
@@ -0,0 +1,107 @@
+import queue
+import sys
+import tkinter
+from concurrent.futures import ThreadPoolExecutor
+
+SCAN_KEY_INTERVAL_MS = 30
+SCAN_FLUSH_MS = 100
+MIN_BARCODE_LENGTH = 8
+MAX_BARCODE_LENGTH = 13
+RESOLVE_POLL_MS = 20
+
+
+class BarcodeScanner:
+    # Сканер печатает цифры и Enter намного быстрее человека: серия нажатий с короткими
+    # интервалами считается штрихкодом. Коды копятся, ищутся в каталоге в фоновом потоке
+    # (на ленивом каталоге поиск может разбирать категорию) и уходят в корзину одной пачкой
+    def __init__(self, master, cart, on_scanned=None, key_interval=SCAN_KEY_INTERVAL_MS, flush_ms=SCAN_FLUSH_MS):
+        self.master = master
+        self.cart = cart
+        self.on_scanned = on_scanned
+        self.key_interval = key_interval
+        self.flush_ms = flush_ms
+        self.buffer = []
+        self.last_time = None
+        self.scanned = []
+        self.flush_job = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.resolved = queue.Queue()
+        self.resolving = 0
+        self.poll_job = None
+
+    def on_key(self, event):
+        if event.char and event.char.isdigit():
+            if self.buffer and event.time - self.last_time > self.key_interval:
+                self.buffer = []
+            self.buffer.append(event.char)
+            self.last_time = event.time
+            return None
+
+        if event.keysym in ("Return", "KP_Enter") and self.buffer:
+            is_scan = (MIN_BARCODE_LENGTH <= len(self.buffer) <= MAX_BARCODE_LENGTH
+                       and event.time - self.last_time <= self.key_interval)
+            code = "".join(self.buffer)
+            self.buffer = []
+            if is_scan:
+                self.accept(code)
+                return "break"
+            return None
+
+        self.buffer = []
+        return None
+
+    def accept(self, code):
+        # цифры успели попасть в поле ввода, в котором стоял фокус, убираем их оттуда
+        widget = self.master.focus_get()
+        if isinstance(widget, tkinter.Entry):
+            text = widget.get()
+            if text.endswith(code):
+                widget.delete(len(text) - len(code), "end")
+
+        self.scanned.append(code)
+        if self.flush_job is None:
+            self.flush_job = self.master.after(self.flush_ms, self.flush)
+
+    def flush(self):
+        self.flush_job = None
+        codes, self.scanned = self.scanned, []
+        self.resolving += 1
+        self.executor.submit(self.resolve, self.cart.catalog, codes)
+        if self.poll_job is None:
+            self.poll_job = self.master.after(RESOLVE_POLL_MS, self.poll)
+
+    def resolve(self, catalog, codes):
+        # в интерфейс возвращаются артикулы: каталог к этому времени мог смениться на новый снимок
+        # если поиск упал, необработанные коды показываются как неизвестные, а не теряются
+        skus = []
+        unknown = []
+        index = 0
+        try:
+            for index, code in enumerate(codes):
+                product = catalog.get_by_barcode(code)
+                if product is None:
+                    unknown.append(code)
+                else:
+                    skus.append(product.sku)
+        except Exception as error:
+            print(f"штрихкод {codes[index]}: поиск не выполнен: {error!r}", file=sys.stderr)
+            unknown.extend(codes[index:])
+        finally:
+            self.resolved.put((skus, unknown))
+
+    def poll(self):
+        self.poll_job = None
+        while True:
+            try:
+                skus, unknown = self.resolved.get_nowait()
+            except queue.Empty:
+                break
+            self.resolving -= 1
+            self.apply(skus, unknown)
+        if self.resolving:
+            self.poll_job = self.master.after(RESOLVE_POLL_MS, self.poll)
+
+    def apply(self, skus, unknown):
+        missing = set(self.cart.add_many(skus))
+        if self.on_scanned is not None:
+            self.on_scanned([self.cart.catalog.get_by_sku(sku) for sku in skus if sku not in missing], unknown)
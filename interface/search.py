@@ -0,0 +1,107 @@
+import heapq
+
+NGRAM = 3
+SEARCH_LIMIT = 50
+
+
+def normalize(text):
+    return text.casefold().replace("ё", "е")
+
+
+class SearchIndex:
+    def __init__(self, products, ngram=NGRAM, limit=SEARCH_LIMIT):
+        # список или ленивая последовательность каталога: объекты товаров собираются только для выдачи
+        self.products = products
+        self.ngram = ngram
+        self.limit = limit
+        self.keys = [normalize(product.name) for product in self.products]
+
+        # постинги для всех подстрок длины 1..ngram, id идут по возрастанию
+        self.postings = {}
+        for product_id, key in enumerate(self.keys):
+            seen = set()
+            for size in range(1, ngram + 1):
+                for start in range(len(key) - size + 1):
+                    seen.add(key[start:start + size])
+            for gram in seen:
+                self.postings.setdefault(gram, []).append(product_id)
+
+        self._last_query = None
+        self._last_ids = None
+
+    @classmethod
+    def from_parts(cls, products, keys, postings, ngram=NGRAM, limit=SEARCH_LIMIT):
+        # индекс из готовых ключей и постингов, например из общего снимка каталога
+        index = cls.__new__(cls)
+        index.products = products
+        index.ngram = ngram
+        index.limit = limit
+        index.keys = keys
+        index.postings = postings
+        index._last_query = None
+        index._last_ids = None
+        return index
+
+    def _candidates(self, query):
+        if len(query) <= self.ngram:
+            best = self.postings.get(query, [])
+        else:
+            best = None
+            for start in range(len(query) - self.ngram + 1):
+                posting = self.postings.get(query[start:start + self.ngram], [])
+                if best is None or len(posting) < len(best):
+                    best = posting
+                if not best:
+                    break
+
+        # при наборе очередной буквы сужаем предыдущий результат, а не ищем заново
+        if self._last_query and self._last_query in query and len(self._last_ids) < len(best):
+            best = self._last_ids
+        return best
+
+    def match_ids(self, query):
+        query = normalize(query)
+        if not query:
+            return list(range(len(self.products)))
+
+        if query == self._last_query:
+            return self._last_ids
+
+        candidates = self._candidates(query)
+        if len(query) <= self.ngram and candidates is not self._last_ids:
+            ids = list(candidates)
+        else:
+            keys = self.keys
+            ids = [product_id for product_id in candidates if query in keys[product_id]]
+
+        self._last_query = query
+        self._last_ids = ids
+        return ids
+
+    def _rank(self, query):
+        keys = self.keys
+
+        def rank(product_id):
+            key = keys[product_id]
+            position = key.find(query)
+            if position == 0:
+                group = 0
+            elif not key[position - 1].isalnum():
+                group = 1
+            else:
+                group = 2
+            return group, position, product_id
+
+        return rank
+
+    def search(self, query, limit=None):
+        limit = self.limit if limit is None else limit
+        ids = self.match_ids(query)
+        query = normalize(query)
+        if not query:
+            ranked = ids[:limit] if limit else ids
+        elif limit and len(ids) > limit:
+            ranked = heapq.nsmallest(limit, ids, key=self._rank(query))
+        else:
+            ranked = sorted(ids, key=self._rank(query))
+        return [self.products[product_id] for product_id in ranked]
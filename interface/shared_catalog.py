@@ -0,0 +1,281 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from catalog import Product, ProductSequence, StringColumn
+from loader import load_catalog
+from search import SearchIndex
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SHARED_DIR = os.environ.get("KIOSK_SHARED_CATALOG")
+MAGIC = b"KSC1"
+HEADER = struct.Struct("<4sI")
+ALIGN = 8
+TEXT_FIELDS = ("sku", "name", "quantity", "barcode", "key")
+BUNDLE_EXTENSION = ".kiosk"
+
+
+def source_signature(source):
+    stat = os.stat(source)
+    return [os.path.abspath(source), stat.st_mtime_ns, stat.st_size]
+
+
+def snapshot_path(source, directory):
+    return os.path.join(directory, os.path.basename(source) + BUNDLE_EXTENSION)
+
+
+class SortedKey:
+    # поиск по строковому полю через перестановку id, отсортированную по значению поля
+    __slots__ = ("column", "order")
+
+    def __init__(self, column, order):
+        self.column = column
+        self.order = order
+
+    def find(self, value):
+        encoded = value.encode("utf-8")
+        order, raw = self.order, self.column.raw
+        position = bisect_left(range(len(order)), encoded, key=lambda index: raw(order[index]))
+        if position < len(order) and raw(order[position]) == encoded:
+            return order[position]
+        return None
+
+
+class Postings:
+    # постинги индекса поиска: отсортированные подстроки и срезы id без копирования
+    __slots__ = ("grams", "offsets", "ids")
+
+    def __init__(self, grams, offsets, ids):
+        self.grams = grams
+        self.offsets = offsets
+        self.ids = ids
+
+    def get(self, gram, default=None):
+        encoded = gram.encode("utf-8")
+        raw = self.grams.raw
+        position = bisect_left(range(len(self.grams)), encoded, key=raw)
+        if position == len(self.grams) or raw(position) != encoded:
+            return default
+        return self.ids[self.offsets[position]:self.offsets[position + 1]]
+
+
+class SharedCatalog:
+    # Каталог поверх снимка, отображенного в память только для чтения. Страницы файла общие
+    # для всех процессов киоска на машине, в памяти процесса живут только показанные товары
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: не снимок каталога")
+        self.header = json.loads(self.mmap[HEADER.size:HEADER.size + header_size])
+        self.errors = [tuple(error) for error in self.header["errors"]]
+        self.pending = {}
+        self.source = None
+
+        view = memoryview(self.mmap)
+        sections = {name: view[offset:offset + size].cast(typecode)
+                    for name, (typecode, offset, size) in self.header["sections"].items()}
+
+        def column(name):
+            return StringColumn(sections[name + ".offsets"], sections[name + ".data"])
+
+        self.price = sections["price"]
+        self.category = sections["category"]
+        self.columns = {field: column(field) for field in TEXT_FIELDS}
+        self.category_list = self.header["categories"]
+        self.category_ids = {name: sections["category_ids"][start:end]
+                             for name, (start, end) in zip(self.category_list, self.header["category_ranges"])}
+        self.by_sku = SortedKey(self.columns["sku"], sections["sku_order"])
+        self.by_name = SortedKey(self.columns["name"], sections["name_order"])
+        self.by_barcode = SortedKey(self.columns["barcode"], sections["barcode_order"])
+        self.products = ProductSequence(self, range(len(self.price)))
+        self.postings = Postings(column("grams"), sections["postings.offsets"], sections["postings.ids"])
+
+    def __len__(self):
+        return len(self.price)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def get(self, product_id):
+        columns = self.columns
+        category = self.category[product_id]
+        return Product(product_id, columns["sku"][product_id], columns["name"][product_id],
+                       columns["quantity"][product_id], self.price[product_id],
+                       self.category_list[category] if category >= 0 else None)
+
+    def _get_by(self, key, value):
+        product_id = key.find(value) if value else None
+        return None if product_id is None else self.get(product_id)
+
+    def get_by_sku(self, sku):
+        return self._get_by(self.by_sku, sku)
+
+    def get_by_name(self, name):
+        return self._get_by(self.by_name, name)
+
+    def get_by_barcode(self, barcode):
+        return self._get_by(self.by_barcode, barcode)
+
+    def category_names(self):
+        return list(self.category_list)
+
+    def materialize_all(self):
+        return self.products
+
+    def category_products(self, category):
+        return ProductSequence(self, self.category_ids.get(category, ()))
+
+    def search_index(self):
+        return SearchIndex.from_parts(self.products, self.columns["key"], self.postings, self.header["ngram"])
+
+
+def write_snapshot(path, catalog, search_index, signature):
+    products = catalog.products
+    count = len(products)
+    sections = {}
+
+    def strings(name, values):
+        offsets = array("I", [0])
+        data = bytearray()
+        for value in values:
+            data += value.encode("utf-8")
+            offsets.append(len(data))
+        sections[name + ".offsets"] = offsets
+        sections[name + ".data"] = array("B", data)
+
+    categories = list(catalog.categories)
+    category_index = {name: index for index, name in enumerate(categories)}
+    columns = {
+        "sku": [product.sku for product in products],
+        "name": [product.name for product in products],
+        "quantity": [product.quantity for product in products],
+        "barcode": [catalog.barcodes[product_id] for product_id in range(count)],
+        "key": search_index.keys,
+    }
+    for field in TEXT_FIELDS:
+        strings(field, columns[field])
+
+    sections["price"] = array("q", (product.price for product in products))
+    sections["category"] = array("i", (category_index.get(product.category, -1) for product in products))
+    # сортировка по байтам UTF-8, при равных значениях первым идет меньший id, как в Catalog.by_name
+    for field in ("sku", "name", "barcode"):
+        values = [value.encode("utf-8") for value in columns[field]]
+        sections[field + "_order"] = array("I", sorted(range(count), key=lambda index: (values[index], index)))
+
+    category_ids = array("I")
+    category_ranges = []
+    for name in categories:
+        start = len(category_ids)
+        category_ids.extend(catalog.categories[name])
+        category_ranges.append((start, len(category_ids)))
+    sections["category_ids"] = category_ids
+
+    grams = sorted(search_index.postings, key=lambda gram: gram.encode("utf-8"))
+    strings("grams", grams)
+    posting_offsets = array("I", [0])
+    posting_ids = array("I")
+    for gram in grams:
+        posting_ids.extend(search_index.postings[gram])
+        posting_offsets.append(len(posting_ids))
+    sections["postings.offsets"] = posting_offsets
+    sections["postings.ids"] = posting_ids
+
+    header = {
+        "source": signature,
+        "ngram": search_index.ngram,
+        "errors": catalog.errors,
+        "categories": categories,
+        "category_ranges": category_ranges,
+        "sections": {},
+    }
+    # заголовок зависит от смещений секций, поэтому смещения считаются от запаса под него
+    layout = {}
+    header_room = len(json.dumps(header)) + 64 * len(sections) + ALIGN
+    position = HEADER.size + header_room
+    for name, values in sections.items():
+        position += -position % ALIGN
+        size = len(values) * values.itemsize
+        layout[name] = (values.typecode, position, size)
+        position += size
+    header["sections"] = layout
+    encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    if len(encoded) > header_room:
+        raise ValueError("заголовок снимка не поместился")
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(encoded)))
+        file.write(encoded)
+        for name, values in sections.items():
+            file.seek(layout[name][1])
+            values.tofile(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def read_signature(path):
+    try:
+        with open(path, "rb") as file:
+            magic, header_size = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                return None
+            return json.loads(file.read(header_size))["source"]
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def open_shared_catalog(source, directory=SHARED_DIR):
+    # Первый процесс разбирает файл каталога и публикует снимок, остальные просто отображают его в память.
+    # Пока один процесс строит снимок, остальные ждут на блокировке, а не разбирают тот же файл
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(source, directory)
+    signature = source_signature(source)
+
+    with open(path + ".lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if read_signature(path) != signature:
+            publish(source, path)
+    return open_bundle(path)
+
+
+def publish(source, path):
+    catalog = load_catalog(source, copy=True)
+    catalog.materialize_all()
+    catalog.source.close()
+    write_snapshot(path, catalog, SearchIndex(catalog.products), source_signature(source))
+    return catalog.errors
+
+
+def open_bundle(path):
+    catalog = SharedCatalog(path)
+    return catalog, catalog.search_index()
+
+
+def main():
+    # готовый снимок кладется рядом с киоском и открывается при старте без разбора каталога
+    parser = argparse.ArgumentParser(description="Сборка снимка каталога для быстрого старта")
+    parser.add_argument("catalog", help="файл каталога .csv или .jsonl")
+    parser.add_argument("-o", "--output", help=f"куда записать снимок, по умолчанию рядом с каталогом ({BUNDLE_EXTENSION})")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.catalog)[0] + BUNDLE_EXTENSION
+    for line_number, message in publish(args.catalog, output):
+        print(f"{args.catalog}:{line_number}: {message}", file=sys.stderr)
+    print(f"Снимок каталога записан в {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+from memory_monitor import MemoryMonitor
+
+# Прогон киоска на тысячах синтетических переходов и правок корзины.
+# Нужен дисплей, на сервере запускать под Xvfb: xvfb-run python soak.py
+
+
+def actions(app, rng):
+    product_ids = range(len(app.catalog.materialize_all()))
+    categories = app.catalog.category_names() or list(app.product_images)
+
+    def search():
+        app.open_products_screen()
+        app.search_entry.delete(0, "end")
+        app.search_entry.insert(0, rng.choice(["мол", "а", "хлеб", "ябл", "с"]))
+        app.run_search()
+
+    return [
+        app.open_products_screen,
+        app.open_discounts_screen,
+        app.open_cart_screen,
+        app.back_to_previous_screen,
+        app.back_to_main_screen,
+        lambda: (app.open_products_screen(), app.show_category_products(rng.choice(categories))),
+        search,
+        lambda: app.add_to_cart(rng.choice(product_ids)),
+        lambda: app.increase_quantity(rng.choice(product_ids)),
+        lambda: app.decrease_quantity(rng.choice(product_ids)),
+        lambda: app.remove_from_cart(rng.choice(product_ids)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка стабильности памяти киоска")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--snapshots", type=int, default=5)
+    parser.add_argument("--catalog")
+    parser.add_argument("--max-widget-growth", type=int, default=50)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # журнал корзины и заказы прогона не должны попасть в рабочую папку киоска;
+        # пути читаются при импорте, поэтому интерфейс импортируется после них
+        os.environ["KIOSK_CART_JOURNAL"] = os.path.join(directory, "cart.journal")
+        os.environ["KIOSK_ORDER_LOG"] = os.path.join(directory, "orders")
+        return run(args)
+
+
+def run(args):
+    from interface import App
+
+    app = App(args.catalog)
+    rng = random.Random(args.seed)
+    steps = actions(app, rng)
+    monitor = MemoryMonitor(app)
+    every = max(1, args.iterations // args.snapshots)
+    state = {"iteration": 0, "baseline": None, "result": 1}
+
+    def step():
+        for _ in range(10):
+            if state["iteration"] >= args.iterations:
+                finish()
+                return
+            rng.choice(steps)()
+            state["iteration"] += 1
+            if state["iteration"] % every == 0:
+                app.update()
+                record = monitor.report(monitor.snapshot())
+                # первые шаги прогревают экраны и кэши, базовый снимок берется после них
+                if state["baseline"] is None:
+                    state["baseline"] = record
+        app.after(1, step)
+
+    def finish():
+        app.update()
+        growth = monitor.growth(state["baseline"] or monitor.snapshot(), monitor.snapshot())
+        print(json.dumps(growth, ensure_ascii=False, indent=2))
+        stable = (growth["widgets_total"] <= args.max_widget_growth
+                  and growth["rss"] <= args.max_rss_growth_mb * 2 ** 20)
+        print("память стабильна" if stable else "обнаружен рост памяти")
+        state["result"] = 0 if stable else 1
+        app.destroy()
+
+    app.after(100, step)
+    app.mainloop()
+    return state["result"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
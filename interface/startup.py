@@ -0,0 +1,26 @@
+import json
+import os
+import time
+
+STARTUP_TRACE = os.environ.get("KIOSK_STARTUP_TRACE")
+FAST_START = os.environ.get("KIOSK_FAST_START") == "1"
+
+
+class StartupTrace:
+    # Отметки запуска (конец импортов, первый кадр, готовность интерфейса) в абсолютном time.time(),
+    # чтобы бенчмарк мог отсчитать их от момента, когда он сам запустил процесс
+    def __init__(self, path=STARTUP_TRACE, **marks):
+        self.path = path
+        self.marks = dict(marks)
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.time()
+
+    def write(self):
+        if not self.path:
+            return
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.marks, file)
+        os.replace(temporary, self.path)
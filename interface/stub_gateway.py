@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import random
+import uuid
+
+# Локальный шлюз оплаты для проверки без сети: задержка, ошибки 5xx и обрывы соединения настраиваются
+
+
+class StubGateway:
+    def __init__(self, latency=0.1, fail_rate=0.0, drop_rate=0.0, seed=None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.payments = {}
+        self.requests = 0
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+                if self.random.random() < self.drop_rate:
+                    break
+
+                status, result = self.process(method, path, headers, body)
+                payload = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n".encode("ascii") + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def process(self, method, path, headers, body):
+        if method != "POST" or path != "/payments":
+            return 404, {"error": "не найдено"}
+        if self.random.random() < self.fail_rate:
+            return 503, {"error": "шлюз недоступен"}
+
+        key = headers.get("idempotency-key")
+        if key in self.payments:
+            return 200, self.payments[key]
+        try:
+            amount = json.loads(body)["amount"]
+        except (ValueError, KeyError):
+            return 400, {"error": "неверный запрос"}
+        payment = {"id": str(uuid.uuid4()), "status": "paid", "amount": amount}
+        if key:
+            self.payments[key] = payment
+        return 200, payment
+
+    async def start(self, host="127.0.0.1", port=8765):
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Заглушка платежного шлюза")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=100, help="задержка ответа, мс")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="доля оборванных соединений")
+    args = parser.parse_args()
+
+    gateway = StubGateway(args.latency / 1000, args.fail_rate, args.drop_rate)
+    server = await gateway.start(args.host, args.port)
+    print(f"Шлюз слушает http://{args.host}:{args.port}/payments")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loader import load_catalog
+
+HEADER = "sku,name,quantity,price,category,barcode\n"
+
+
+class LazyCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, lines):
+        path = os.path.join(self.directory.name, "catalog.csv")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(HEADER + "".join(line + "\n" for line in lines))
+        return path
+
+    def test_reader_waits_for_category_filled_by_other_thread(self):
+        path = self.write(f"{number},Товар {number},1 шт,10₽,{'AB'[number % 2]},{10 ** 12 + number}"
+                          for number in range(20000))
+        for delay in (0, 0.005, 0.01):
+            catalog = load_catalog(path)
+            worker = threading.Thread(target=catalog.materialize_all)
+            worker.start()
+            time.sleep(delay)
+            self.assertEqual(len(catalog.category_products("A")), 10000)
+            self.assertIsNotNone(catalog.get_by_sku("19998"))
+            self.assertIsNotNone(catalog.get_by_barcode(str(10 ** 12 + 19996)))
+            worker.join()
+            catalog.source.close()
+
+    def test_first_duplicate_in_file_wins_whatever_is_opened_first(self):
+        path = self.write([
+            "1,Хлеб,1 шт,30₽,Выпечка,111",
+            "2,Молоко,1 л,60₽,Молочный,222",
+            "3,Сыр,1 шт,90₽,Молочный,111",
+            "1,Дубль,1 шт,10₽,Молочный,333",
+        ])
+        eager = load_catalog(path)
+        eager.materialize_all()
+        lazy = load_catalog(path)
+        self.assertEqual(lazy.get_by_barcode("222").name, "Молоко")
+
+        for catalog in (eager, lazy):
+            self.assertEqual(catalog.get_by_sku("1").name, "Хлеб")
+            self.assertIsNone(catalog.get_by_sku("3"))
+            self.assertIsNone(catalog.get_by_barcode("333"))
+            self.assertEqual(sorted(catalog.category_names()), ["Выпечка", "Молочный"])
+            self.assertEqual(sorted(catalog.errors), [(4, "Штрихкод 111 уже есть в каталоге"),
+                                                      (5, "Артикул 1 уже есть в каталоге")])
+            catalog.source.close()
+
+    def test_lookup_parses_only_the_category_of_the_key(self):
+        path = self.write(["1,Хлеб,1 шт,30₽,Выпечка,111", "2,Молоко,1 л,60₽,Молочный,222"])
+        catalog = load_catalog(path)
+        self.assertIsNone(catalog.get_by_sku("2001"))
+        self.assertIsNone(catalog.get_by_barcode("999"))
+        self.assertEqual(len(catalog), 0)
+
+        self.assertEqual(catalog.get_by_sku("2").name, "Молоко")
+        self.assertEqual(list(catalog.pending), ["Выпечка"])
+        self.assertEqual(catalog.get_by_barcode("111").name, "Хлеб")
+        self.assertEqual(catalog.pending, {})
+        catalog.source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog
+from core import Cart
+from pricing import Pricing
+
+
+def make_catalog(rows):
+    catalog = Catalog()
+    for sku, name, price in rows:
+        catalog.add(sku, name, "1 шт", price)
+    return catalog
+
+
+class CartTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = make_catalog([("1", "Хлеб", "30₽"), ("2", "Молоко", "60₽"), ("3", "Сыр", "150₽")])
+        self.cart = Cart(self.catalog, Pricing([]))
+        self.events = []
+        self.cart.subscribe(self.events.append)
+
+    def test_each_operation_notifies_changed_ids(self):
+        self.cart.add(0)
+        self.cart.add(1, 2)
+        self.cart.remove(0)
+        self.assertEqual(self.events, [{0}, {1}, {0}])
+        self.assertEqual(dict(self.cart.items()), {1: 2})
+        self.assertEqual(self.cart.total(), 120)
+
+    def test_remove_below_zero_drops_line(self):
+        self.cart.add(2)
+        self.assertEqual(self.cart.remove(2, 5), 0)
+        self.assertNotIn(2, self.cart)
+        self.assertEqual(self.cart.total(), 0)
+
+    def test_batch_notifies_once(self):
+        with self.cart.batch():
+            self.cart.add(0)
+            with self.cart.batch():
+                self.cart.add(1)
+                self.cart.add(0)
+            self.assertEqual(self.events, [])
+        self.assertEqual(self.events, [{0, 1}])
+        self.assertEqual(self.cart.count(0), 2)
+
+    def test_add_many_reports_unknown_skus(self):
+        unknown = self.cart.add_many(["1", "1", "3", "404"])
+        self.assertEqual(unknown, ["404"])
+        self.assertEqual(dict(self.cart.items()), {0: 2, 2: 1})
+        self.assertEqual(len(self.events), 1)
+
+    def test_apply_basket_replaces_contents(self):
+        self.cart.add(0, 3)
+        self.cart.apply_basket({"2": 1, "3": 2})
+        self.assertEqual(dict(self.cart.items()), {1: 1, 2: 2})
+        self.assertEqual(self.cart.total(), 360)
+
+    def test_rebind_maps_lines_by_sku(self):
+        self.cart.add(0, 2)
+        self.cart.add(2)
+        # в новом снимке другой порядок строк, новая цена и нет артикула 1
+        catalog = make_catalog([("3", "Сыр", "200₽"), ("4", "Кефир", "70₽"), ("2", "Молоко", "60₽")])
+        self.events.clear()
+
+        mapping = self.cart.rebind(catalog)
+
+        self.assertEqual(mapping, {2: 0})
+        self.assertEqual(self.events, [{0}])
+        self.assertIs(self.cart.catalog, catalog)
+        self.assertEqual(dict(self.cart.items()), {0: 1})
+        self.assertEqual(self.cart.total(), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog
+from core import Cart
+from journal import CartJournal, journal_path
+from pricing import Pricing
+
+
+class CartJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cart.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+    def test_empty_recovery(self):
+        self.assertEqual(CartJournal(self.path).recover(), {})
+
+    def test_last_record_wins_and_zero_removes(self):
+        self.write("1\t2\n2\t1\n1\t5\n2\t0\n")
+        self.assertEqual(CartJournal(self.path).recover(), {"1": 5})
+
+    def test_torn_last_line_is_ignored(self):
+        self.write("1\t2\n2\t1\n1\t")
+        journal = CartJournal(self.path)
+        self.assertEqual(journal.recover(), {"1": 2, "2": 1})
+        self.assertEqual(journal.records, 2)
+
+    def test_garbage_lines_are_skipped(self):
+        self.write("1\t2\nмусор\n2\tx\n\n3\t1\n")
+        self.assertEqual(CartJournal(self.path).recover(), {"1": 2, "3": 1})
+
+    def test_journal_is_replayed_over_snapshot(self):
+        with open(self.path + ".snapshot", "w", encoding="utf-8") as file:
+            file.write('{"1": 3, "2": 1}')
+        self.write("2\t0\n3\t4\n")
+        self.assertEqual(CartJournal(self.path).recover(), {"1": 3, "3": 4})
+
+    def test_cart_survives_restart_with_compaction(self):
+        catalog = Catalog()
+        for sku in ("1", "2", "3"):
+            catalog.add(sku, f"Товар {sku}", "1 шт", "10₽")
+
+        journal = CartJournal(self.path, flush_interval=60, compact_records=3)
+        journal.recover()
+        journal.open()
+        cart = Cart(catalog, Pricing([]))
+        journal.attach(cart)
+        cart.add(0, 2)
+        cart.add(1)
+        journal.flush()
+        cart.remove(0, 2)
+        cart.add(2, 3)
+        journal.close()
+
+        recovered = CartJournal(self.path)
+        self.assertEqual(recovered.recover(), {"2": 1, "3": 3})
+        self.assertTrue(os.path.exists(self.path + ".snapshot"))
+
+    def test_each_instance_gets_its_own_path(self):
+        self.assertEqual(journal_path(None, self.path), self.path)
+        first, second = journal_path("1", self.path), journal_path(":0.1", self.path)
+        self.assertEqual(os.path.basename(first), "cart-1.journal")
+        self.assertEqual(os.path.basename(second), "cart-_0.1.journal")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Product
+from pricing import BundleRule, NPlusMRule, PercentRule, Pricing, format_price, parse_price
+
+
+def product(product_id, sku, price):
+    return Product(product_id, sku, sku, "1 шт", price, None)
+
+
+class ParsePriceTest(unittest.TestCase):
+    def test_valid_prices(self):
+        self.assertEqual(parse_price("100₽"), 10000)
+        self.assertEqual(parse_price("89.99₽"), 8999)
+        self.assertEqual(parse_price("259,99₽"), 25999)
+        self.assertEqual(parse_price("1.5"), 150)
+
+    def test_rejects_sign_and_extra_digits(self):
+        for text in ("-5.50₽", "+1₽", "1.234₽", "", "₽", "1.₽", "abc"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_price(text)
+
+    def test_format_round_trip(self):
+        for kopecks in (0, 5, 100, 8999, 25999):
+            self.assertEqual(parse_price(format_price(kopecks)), kopecks)
+
+
+class RuleTest(unittest.TestCase):
+    def test_bundle_charges_leftover_at_unit_price(self):
+        rule = BundleRule({"quantity": 2, "price": "259,99₽"})
+        self.assertEqual(rule.line_total(1, 15000), 15000)
+        self.assertEqual(rule.line_total(2, 15000), 25999)
+        self.assertEqual(rule.line_total(5, 15000), 2 * 25999 + 15000)
+        self.assertIsNone(rule.price_text(1, 15000))
+
+    def test_n_plus_m(self):
+        rule = NPlusMRule({"buy": 2, "free": 1})
+        self.assertEqual(rule.quantity, 3)
+        self.assertEqual(rule.line_total(3, 100), 200)
+        self.assertEqual(rule.line_total(7, 100), 500)
+
+    def test_percent_rounds_to_kopeck(self):
+        rule = PercentRule({"percent": 25})
+        self.assertEqual(rule.line_total(1, 11999), 8999)
+        self.assertEqual(rule.line_total(3, 11999), 26998)
+
+
+class PricingTest(unittest.TestCase):
+    def test_running_total_follows_line_changes(self):
+        pricing = Pricing([{"type": "bundle", "sku": "k", "quantity": 2, "price": "259,99₽", "title": ""}])
+        kinder, bread = product(0, "k", 15000), product(1, "b", 3000)
+
+        pricing.set_count(kinder, 3)
+        pricing.set_count(bread, 2)
+        self.assertEqual(pricing.total, 25999 + 15000 + 6000)
+        pricing.set_count(kinder, 0)
+        self.assertEqual(pricing.total, 6000)
+        self.assertEqual(pricing.line_totals, {1: 6000})
+        self.assertEqual(pricing.promo_quantity(kinder), 2)
+        self.assertEqual(pricing.promo_quantity(bread), 1)
+
+        pricing.reset()
+        self.assertEqual(pricing.total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
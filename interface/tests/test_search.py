@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from catalog import Catalog
+from search import SearchIndex, normalize
+from synthetic import WORDS, generate_products
+
+
+class SearchIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = Catalog()
+        for row in generate_products(3000):
+            cls.catalog.add(**row)
+        cls.names = [normalize(product.name) for product in cls.catalog]
+
+    def scan(self, query):
+        query = normalize(query)
+        return [product_id for product_id, name in enumerate(self.names) if query in name]
+
+    def queries(self):
+        rng = random.Random(7)
+        queries = ["", "я", "Ё", "ежевика", "сыр дом", "о 1", "нет такого", " 29"]
+        for word in WORDS:
+            # запросы как при наборе, с расширением и сокращением
+            queries.extend(word[:length] for length in range(1, len(word) + 1))
+            queries.extend(word[:length] for length in range(len(word), 0, -1))
+        queries.extend(self.names[rng.randrange(len(self.names))][2:9] for _ in range(50))
+        return queries
+
+    def test_match_ids_equals_substring_scan(self):
+        index = SearchIndex(self.catalog.products)
+        for query in self.queries():
+            with self.subTest(query=query):
+                self.assertEqual(sorted(index.match_ids(query)), self.scan(query))
+
+    def test_search_returns_best_matches_first(self):
+        index = SearchIndex(self.catalog.products, limit=20)
+        for query in ("сыр", "мол", "ный"):
+            with self.subTest(query=query):
+                found = index.search(query)
+                self.assertEqual(len(found), min(20, len(self.scan(query))))
+                self.assertTrue(all(normalize(query) in normalize(product.name) for product in found))
+                # сначала совпадения с начала названия
+                starts = [normalize(product.name).startswith(query) for product in found]
+                self.assertEqual(starts, sorted(starts, reverse=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import customtkinter as ctk
+
+TOAST_MS = 1500
+MAX_TOASTS = 3
+
+
+class _Toast:
+    __slots__ = ("key", "text", "count", "label", "job")
+
+
+class ToastQueue:
+    # Короткие уведомления внутри окна вместо модальных окон, одинаковые подряд склеиваются в «×N»
+    def __init__(self, master, duration=TOAST_MS, max_visible=MAX_TOASTS):
+        self.master = master
+        self.duration = duration
+        self.max_visible = max_visible
+        self.toasts = []
+
+    def show(self, text, key=None):
+        key = key or text
+        for toast in self.toasts:
+            if toast.key == key:
+                toast.count += 1
+                toast.label.configure(text=f"{toast.text} ×{toast.count}")
+                self.master.after_cancel(toast.job)
+                toast.job = self.master.after(self.duration, lambda t=toast: self.dismiss(t))
+                return
+
+        if len(self.toasts) >= self.max_visible:
+            oldest = self.toasts[0]
+            self.master.after_cancel(oldest.job)
+            self.dismiss(oldest)
+
+        toast = _Toast()
+        toast.key = key
+        toast.text = text
+        toast.count = 1
+        toast.label = ctk.CTkLabel(self.master, text=text, font=("Arial", 14), text_color="black",
+                                   fg_color="#ffd600", corner_radius=10, width=300, height=30)
+        toast.job = self.master.after(self.duration, lambda: self.dismiss(toast))
+        self.toasts.append(toast)
+        self.layout()
+
+    def dismiss(self, toast):
+        if toast in self.toasts:
+            self.toasts.remove(toast)
+            toast.label.destroy()
+            self.layout()
+
+    def layout(self):
+        for index, toast in enumerate(reversed(self.toasts)):
+            toast.label.place(relx=0.5, rely=0.8 - index * 0.05, anchor="center")
+            toast.label.lift()